@@ -0,0 +1,277 @@
+import os
+import sys
+import json
+import numpy as np
+
+# ------------------------
+# Schemas
+# ------------------------
+# Each schema fixes the node layout of the per-document graph; the store
+# header records it so readers never mix feature layouts.
+
+SCHEMAS = {
+    # Training graph: [user, aadhaar hash, pan hash] (see FraudGraphDataset)
+    "identity_hash": {"nodes": 3, "dims": 8},
+    # Scoring graph: [name_on_doc, aadhaar_number, pan_number, type]
+    "document_fields": {"nodes": 4, "dims": 8},
+}
+STORE_VERSION = 1
+ID_WIDTH = 32  # bytes of UTF-8; a Mongo ObjectId takes 24
+
+DOCUMENT_FIELDS = ("name_on_doc", "aadhaar_number", "pan_number", "type")
+DOCUMENT_FILLER = np.array([0.5, 0.1, 0.2, 0.3, 0.4, 0.6], dtype=np.float32)
+
+# ------------------------
+# Vectorized feature builders
+# ------------------------
+
+_HEX_LUT = np.full(256, -1, dtype=np.int64)
+for _i, _c in enumerate(b"0123456789abcdef"):
+    _HEX_LUT[_c] = _i
+for _i, _c in enumerate(b"ABCDEF"):
+    _HEX_LUT[_c] = 10 + _i
+_PAD = -2
+
+def hash_features_batch(hashes, dims=8):
+    """
+    Vectorized train_gnn.hash_to_features over many hash strings:
+    each 4-char hex chunk -> int(chunk, 16) % 1000 / 1000, 0 for empty or
+    non-hex chunks. Returns a (n, dims) float32 array.
+    """
+    width = dims * 4
+    raw = np.array([(h or "")[:width].encode("ascii", "replace") for h in hashes], dtype=f"S{width}")
+    codes = raw.view(np.uint8).reshape(len(raw), width)
+    digits = np.where(codes == 0, _PAD, _HEX_LUT[codes])
+
+    chunks = digits.reshape(len(raw), dims, 4)
+    present = chunks != _PAD
+    valid = present.any(axis=2) & ~((chunks == -1) & present).any(axis=2)
+
+    value = np.zeros((len(raw), dims), dtype=np.int64)
+    for k in range(4):
+        value = np.where(present[:, :, k], value * 16 + chunks[:, :, k], value)
+    return np.where(valid, (value % 1000) / 1000.0, 0.0).astype(np.float32)
+
+def identity_features_batch(aadhaar_hashes, pan_hashes):
+    n = len(aadhaar_hashes)
+    x = np.empty((n, 3, 8), dtype=np.float32)
+    x[:, 0, :] = 0.5
+    x[:, 1, :] = hash_features_batch(aadhaar_hashes)
+    x[:, 2, :] = hash_features_batch(pan_hashes)
+    return x
+
+def document_features_batch(records):
+    """
+    Vectorized form of the per-field feat() used for the scoring graph:
+    [present, min(len/50, 1), 0.5, 0.1, 0.2, 0.3, 0.4, 0.6] or all zeros.
+    Returns a (n, 4, 8) float32 array.
+    """
+    lengths = np.array(
+        [[len(str(r.get(f))) if r.get(f) else 0 for f in DOCUMENT_FIELDS] for r in records],
+        dtype=np.float32,
+    ).reshape(len(records), len(DOCUMENT_FIELDS))
+    present = (lengths > 0).astype(np.float32)
+
+    x = np.empty((len(records), len(DOCUMENT_FIELDS), 8), dtype=np.float32)
+    x[:, :, 0] = present
+    x[:, :, 1] = np.minimum(lengths / 50.0, 1.0) * present
+    x[:, :, 2:] = DOCUMENT_FILLER * present[:, :, None]
+    return x
+
+# ------------------------
+# Memory-mapped Feature Store
+# ------------------------
+
+def encode_ids(ids):
+    """
+    Record ids -> fixed-width UTF-8 bytes. Ids that do not fit are rejected
+    rather than truncated, since truncated ids could collide.
+    """
+    encoded = [str(i).encode("utf-8") for i in ids]
+    for raw in encoded:
+        if len(raw) > ID_WIDTH:
+            raise ValueError(f"Record id {raw.decode('utf-8')!r} is longer than {ID_WIDTH} bytes")
+    return np.array(encoded, dtype=f"S{ID_WIDTH}")
+
+class FeatureStore:
+    """
+    Append-only columnar store of per-document graph features.
+
+    <dir>/header.json    schema, version, nodes, dims, row count
+    <dir>/features.f32   (count, nodes, dims) float32
+    <dir>/labels.i64     (count,) int64, -1 when unlabelled
+    <dir>/ids.S32        (count,) fixed-width record ids
+
+    Rows become visible only once the header count is updated, so a reader
+    never sees a half-written append.
+    """
+
+    def __init__(self, path, schema=None):
+        self.path = path
+        header_path = os.path.join(path, "header.json")
+        if os.path.exists(header_path):
+            with open(header_path, "r") as f:
+                self.header = json.load(f)
+            if self.header["version"] != STORE_VERSION:
+                raise ValueError(f"Unsupported feature store version {self.header['version']}")
+            if schema and schema != self.header["schema"]:
+                raise ValueError(f"Store at {path} holds '{self.header['schema']}', not '{schema}'")
+        else:
+            if schema not in SCHEMAS:
+                raise ValueError(f"Unknown schema: {schema}")
+            os.makedirs(path, exist_ok=True)
+            self.header = {"schema": schema, "version": STORE_VERSION, "count": 0, **SCHEMAS[schema]}
+            self._write_header()
+        self._maps = {}
+
+    @property
+    def row_shape(self):
+        return (self.header["nodes"], self.header["dims"])
+
+    def __len__(self):
+        return self.header["count"]
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _write_header(self):
+        tmp = self._file("header.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.header, f)
+        os.replace(tmp, self._file("header.json"))
+
+    def refresh(self):
+        """Pick up rows appended by another process."""
+        with open(self._file("header.json"), "r") as f:
+            self.header = json.load(f)
+        self._maps = {}
+
+    # ---- writes ----
+
+    def append(self, features, labels=None, ids=None):
+        features = np.ascontiguousarray(features, dtype=np.float32)
+        n = features.shape[0]
+        if features.shape[1:] != self.row_shape:
+            raise ValueError(f"Expected rows of shape {self.row_shape}, got {features.shape[1:]}")
+        labels = np.full(n, -1, dtype=np.int64) if labels is None else np.asarray(labels, dtype=np.int64)
+        ids = encode_ids([""] * n if ids is None else ids)
+        if len(labels) != n or len(ids) != n:
+            raise ValueError(f"Got {n} feature rows, {len(labels)} labels and {len(ids)} ids")
+
+        count = self.header["count"]
+        row_bytes = 4 * self.row_shape[0] * self.row_shape[1]
+        for name, array, itemsize in (("features.f32", features, row_bytes),
+                                      ("labels.i64", labels, 8),
+                                      (f"ids.S{ID_WIDTH}", ids, ID_WIDTH)):
+            with open(self._file(name), "ab") as f:
+                # Drop bytes left behind by an append that never committed
+                f.truncate(count * itemsize)
+                f.write(array.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        self.header["count"] = count + n
+        self._write_header()
+        self._maps = {}
+        return n
+
+    # ---- zero-copy reads ----
+
+    def _map(self, name, dtype, shape):
+        if name not in self._maps:
+            if len(self) == 0:
+                self._maps[name] = np.empty(shape, dtype=dtype)
+            else:
+                # mode "c": copy-on-write, so torch gets a writable view
+                # without the file ever being modified
+                self._maps[name] = np.memmap(self._file(name), dtype=dtype, mode="c", shape=shape)
+        return self._maps[name]
+
+    @property
+    def features(self):
+        return self._map("features.f32", np.float32, (len(self),) + self.row_shape)
+
+    @property
+    def labels(self):
+        return self._map("labels.i64", np.int64, (len(self),))
+
+    @property
+    def ids(self):
+        return self._map(f"ids.S{ID_WIDTH}", f"S{ID_WIDTH}", (len(self),))
+
+    def id_strings(self, start=0, stop=None):
+        return [raw.decode("utf-8") for raw in self.ids[start:stop]]
+
+    def torch_features(self, start=0, stop=None):
+        import torch
+        return torch.from_numpy(self.features[start:stop])
+
+    def torch_labels(self, start=0, stop=None):
+        import torch
+        return torch.from_numpy(self.labels[start:stop])
+
+    def iter_batches(self, batch_size=65536):
+        for start in range(0, len(self), batch_size):
+            stop = min(start + batch_size, len(self))
+            yield start, self.features[start:stop], self.labels[start:stop]
+
+# ------------------------
+# Materialization from MongoDB
+# ------------------------
+
+def materialize_identity_features(collection, path, batch_size=50000):
+    """Stream the training collection into an 'identity_hash' store."""
+    store = FeatureStore(path, schema="identity_hash")
+    cursor = collection.find(
+        {"aadhaarHash": {"$exists": True, "$ne": None}, "panHash": {"$exists": True, "$ne": None}},
+        {"aadhaarHash": 1, "panHash": 1, "fraudInfo": 1},
+        batch_size=batch_size,
+    )
+    batch = []
+
+    def flush():
+        if not batch:
+            return
+        store.append(
+            identity_features_batch([r.get("aadhaarHash") for r in batch], [r.get("panHash") for r in batch]),
+            labels=[1 if r.get("fraudInfo") and len(r["fraudInfo"]) > 0 else 0 for r in batch],
+            ids=[r.get("_id") for r in batch],
+        )
+        batch.clear()
+
+    for record in cursor:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return store
+
+def materialize_document_features(records, path, batch_size=50000):
+    """Append fraud-input dicts (as sent to fraudScoring) to a 'document_fields' store."""
+    store = FeatureStore(path, schema="document_fields")
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            store.append(document_features_batch(batch), ids=[r.get("id", "") for r in batch])
+            batch.clear()
+    if batch:
+        store.append(document_features_batch(batch), ids=[r.get("id", "") for r in batch])
+    return store
+
+# ------------------------
+# Entry Point
+# ------------------------
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python feature_store.py <store_dir>")
+        sys.exit(1)
+
+    PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    from backend.ai.train_gnn import get_mongo_collection
+
+    store = materialize_identity_features(get_mongo_collection(), sys.argv[1])
+    print(f"✅ Materialized {len(store)} rows ({store.header['schema']}) at {sys.argv[1]}")
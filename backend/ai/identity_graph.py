@@ -0,0 +1,337 @@
+import os
+import re
+import sys
+import pickle
+from collections import defaultdict
+
+# Add project root to sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from utils.records import iter_records
+
+# ------------------------
+# Identifier normalization
+# ------------------------
+
+IDENTIFIER_KINDS = ("aadhaarHash", "panHash", "address", "mobile")
+
+def normalize_address(address):
+    if not address:
+        return ""
+    address = str(address).upper()
+    address = re.sub(r"[^A-Z0-9\s]", " ", address)
+    address = re.sub(r"\s+", " ", address).strip()
+    return "" if address == "N A" else address
+
+def normalize_mobile(mobile):
+    digits = re.sub(r"\D", "", str(mobile or ""))
+    # Drop country code / trunk prefix, keep the 10-digit subscriber number
+    return digits[-10:] if len(digits) >= 10 else ""
+
+def record_identifiers(record):
+    """
+    Pull the shared identifiers out of a KYCRequest document.
+    Returns a list of (kind, value) keys, skipping empty values.
+    """
+    extracted = record.get("extractedData") or {}
+    user_info = record.get("userInfo") or {}
+
+    keys = []
+    for kind in ("aadhaarHash", "panHash"):
+        value = record.get(kind)
+        if value:
+            keys.append((kind, value))
+
+    address = normalize_address(record.get("address") or extracted.get("address"))
+    if address:
+        keys.append(("address", address))
+
+    mobile = normalize_mobile(
+        record.get("mobile") or user_info.get("phone") or extracted.get("mobile")
+    )
+    if mobile:
+        keys.append(("mobile", mobile))
+
+    return keys
+
+def record_id_of(record):
+    rid = record.get("_id")
+    if isinstance(rid, dict):
+        rid = rid.get("$oid")  # mongoexport extended JSON
+    return str(rid)
+
+# ------------------------
+# Applicant Identifier Graph
+# ------------------------
+
+class IdentityGraph:
+    """
+    Incremental applicant graph. Every record and every identifier value is a
+    node; a record is linked to each of its identifiers, so two applicants who
+    share a phone, address or hash end up in the same connected component.
+
+    Components are tracked with union-find (union by size + path compression),
+    so each insert is O(k * alpha(n)) for k identifiers. When an identifier
+    becomes a hub the components are rebuilt without it, which is O(edges)
+    but happens once per hub.
+    """
+
+    def __init__(self, max_key_degree=1000):
+        # Identifiers shared by more records than this (e.g. a PO box or a
+        # placeholder address) are hubs: still indexed, but they merge nothing,
+        # including the records that linked to them before the cap was crossed
+        self.max_key_degree = max_key_degree
+        self.hub_keys = set()
+
+        self.parent = []
+        self.size = []              # records per component, valid at roots
+        self.node_of = {}           # record id or (kind, value) -> node index
+        self.record_of = []         # node index -> record id (None for identifiers)
+
+        self.adjacency = defaultdict(list)   # (kind, value) -> [record ids]
+        self.record_keys = {}                # record id -> [(kind, value)]
+        self.members = {}                    # root node -> [record ids]
+        self._track_members = True
+        self._defer_unions = False
+
+    # ---- union-find ----
+
+    def _new_node(self, key, record_id=None):
+        idx = len(self.parent)
+        self.parent.append(idx)
+        self.size.append(1 if record_id is not None else 0)
+        self.record_of.append(record_id)
+        self.node_of[key] = idx
+        if record_id is not None and self._track_members:
+            self.members[idx] = [record_id]
+        return idx
+
+    def _find(self, idx):
+        parent = self.parent
+        root = idx
+        while parent[root] != root:
+            root = parent[root]
+        while parent[idx] != root:
+            parent[idx], idx = root, parent[idx]
+        return root
+
+    def _union(self, a, b):
+        ra, rb = self._find(a), self._find(b)
+        if ra == rb:
+            return ra
+        # Union by record count; identifier-only roots have size 0 so fall
+        # back to node index to keep the choice deterministic
+        if (self.size[ra], -ra) < (self.size[rb], -rb):
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+        if self._track_members:
+            moved = self.members.pop(rb, None)
+            if moved:
+                self.members.setdefault(ra, []).extend(moved)
+        return ra
+
+    # ---- inserts ----
+
+    def add_record(self, record_id, identifiers):
+        """Insert (or extend) an applicant with its (kind, value) identifiers."""
+        record_id = str(record_id)
+        node = self.node_of.get(record_id)
+        if node is None:
+            node = self._new_node(record_id, record_id)
+            self.record_keys[record_id] = []
+
+        known = self.record_keys[record_id]
+        new_hub = False
+        for key in identifiers:
+            if key in known:
+                continue
+            known.append(key)
+
+            linked = self.adjacency[key]
+            linked.append(record_id)
+
+            key_node = self.node_of.get(key)
+            if key_node is None:
+                key_node = self._new_node(key)
+            if key in self.hub_keys:
+                continue
+            if len(linked) > self.max_key_degree:
+                self.hub_keys.add(key)
+                new_hub = True
+            elif not self._defer_unions:
+                self._union(node, key_node)
+        if new_hub and not self._defer_unions:
+            self._rebuild_components()
+        return self._find(node)
+
+    def add_document(self, record):
+        """Insert a raw KYCRequest document (dict from Mongo or an export)."""
+        return self.add_record(record_id_of(record), record_identifiers(record))
+
+    # ---- queries ----
+
+    def component_size(self, record_id):
+        node = self.node_of.get(str(record_id))
+        if node is None:
+            return 0
+        return self.size[self._find(node)]
+
+    def component_members(self, record_id):
+        node = self.node_of.get(str(record_id))
+        if node is None:
+            return []
+        return list(self.members.get(self._find(node), []))
+
+    def shared_identifiers(self, record_id):
+        """Identifiers of a record that are shared with at least one other applicant."""
+        shared = {}
+        for key in self.record_keys.get(str(record_id), []):
+            others = len(self.adjacency[key]) - 1
+            if others > 0:
+                shared[key[0]] = shared.get(key[0], 0) + others
+        return shared
+
+    def lookup(self, identifiers):
+        """
+        Ring statistics for a submission that has not been inserted yet:
+        the size of the component it would join and the records it touches.
+        """
+        roots = set()
+        matches = set()
+        for key in identifiers:
+            node = self.node_of.get(key)
+            if node is None:
+                continue
+            roots.add(self._find(node))
+            matches.update(self.adjacency[key])
+        return {
+            "component_size": sum(self.size[r] for r in roots),
+            "direct_matches": len(matches),
+        }
+
+    def components(self, min_size=2):
+        for root, records in self.members.items():
+            if len(records) >= min_size:
+                yield records
+
+    def __len__(self):
+        return len(self.record_keys)
+
+    # ---- bulk build ----
+
+    def _rebuild_members(self):
+        self.members = defaultdict(list)
+        for idx, record_id in enumerate(self.record_of):
+            if record_id is not None:
+                self.members[self._find(idx)].append(record_id)
+        self.members = dict(self.members)
+
+    def _rebuild_components(self):
+        """Union-find from scratch over every identifier that is not a hub."""
+        self.parent = list(range(len(self.parent)))
+        self.size = [1 if record_id is not None else 0 for record_id in self.record_of]
+        track, self._track_members = self._track_members, False
+        try:
+            for key, linked in self.adjacency.items():
+                if key in self.hub_keys:
+                    continue
+                key_node = self.node_of[key]
+                for record_id in linked:
+                    self._union(self.node_of[record_id], key_node)
+        finally:
+            self._track_members = track
+        if track:
+            self._rebuild_members()
+
+    def bulk_load(self, records):
+        """
+        Insert many documents at once. Only the identifier index is built
+        while reading; components are merged in one pass at the end, once
+        every identifier's final degree (and so every hub) is known.
+        """
+        self._track_members = False
+        self._defer_unions = True
+        count = 0
+        try:
+            for record in records:
+                self.add_document(record)
+                count += 1
+                if count % 1_000_000 == 0:
+                    print(f"🔗 Indexed {count} records...")
+        finally:
+            self._defer_unions = False
+            self._track_members = True
+            self._rebuild_components()
+        return count
+
+    # ---- persistence ----
+
+    def save(self, path):
+        state = dict(self.__dict__)
+        state["adjacency"] = dict(self.adjacency)
+        with open(path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        graph = cls.__new__(cls)
+        graph.__dict__.update(state)
+        graph.adjacency = defaultdict(list, state["adjacency"])
+        graph.__dict__.setdefault("hub_keys", set())
+        graph.__dict__.setdefault("_defer_unions", False)
+        return graph
+
+# ------------------------
+# Record sources
+# ------------------------
+
+def iter_collection(collection, batch_size=10000):
+    projection = {
+        "aadhaarHash": 1, "panHash": 1,
+        "userInfo.phone": 1, "extractedData.address": 1, "extractedData.mobile": 1,
+    }
+    yield from collection.find({}, projection, batch_size=batch_size)
+
+def build_from_export(path, max_key_degree=1000):
+    graph = IdentityGraph(max_key_degree=max_key_degree)
+    # mongoexport output: one document per line, or a --jsonArray array
+    graph.bulk_load(iter_records(path))
+    return graph
+
+def build_from_collection(collection=None, max_key_degree=1000):
+    if collection is None:
+        from backend.ai.train_gnn import get_mongo_collection
+        collection = get_mongo_collection()
+    graph = IdentityGraph(max_key_degree=max_key_degree)
+    graph.bulk_load(iter_collection(collection))
+    return graph
+
+# ------------------------
+# Entry Point
+# ------------------------
+
+if __name__ == "__main__":
+    import time
+
+    if len(sys.argv) < 2:
+        print("Usage: python identity_graph.py <mongoexport.json> [output.pkl]")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    graph = build_from_export(sys.argv[1])
+    elapsed = time.perf_counter() - start
+
+    rings = sorted(graph.components(min_size=2), key=len, reverse=True)
+    print(f"✅ Indexed {len(graph)} records in {elapsed:.1f}s")
+    print(f"🕸️ {len(rings)} components with shared identifiers")
+    for members in rings[:10]:
+        print(f"  size={len(members)} sample={members[:5]}")
+
+    if len(sys.argv) > 2:
+        graph.save(sys.argv[2])
+        print(f"💾 Graph saved at: {os.path.abspath(sys.argv[2])}")
@@ -0,0 +1,395 @@
+import os
+import re
+import sys
+import json
+import hashlib
+import numpy as np
+
+try:
+    import faiss  # optional: HNSW for oversized blocks
+except ImportError:
+    faiss = None
+
+# Add project root to sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from backend.ai.feature_store import ID_WIDTH, encode_ids
+from backend.ai.identity_graph import record_id_of
+from utils.records import iter_records
+
+EMBEDDING_DIM = 384  # all-MiniLM-L6-v2
+
+# ------------------------
+# Blocking keys
+# ------------------------
+
+def normalize_dob(dob):
+    """Bring dd-mm-yyyy / dd/mm/yy style dates to a single dd-mm-yyyy key."""
+    match = re.search(r"(\d{1,2})[-/.](\d{1,2})[-/.](\d{2,4})", str(dob or ""))
+    if not match:
+        return ""
+    day, month, year = match.groups()
+    if len(year) == 2:
+        year = ("19" if int(year) > 30 else "20") + year
+    return f"{int(day):02d}-{int(month):02d}-{year}"
+
+def extract_pincode(address):
+    match = re.search(r"\b(\d{6})\b", str(address or ""))
+    return match.group(1) if match else ""
+
+def blocking_keys(dob=None, pincode=None):
+    keys = []
+    dob = normalize_dob(dob)
+    if dob:
+        keys.append(f"dob:{dob}")
+    if pincode:
+        keys.append(f"pin:{pincode}")
+    return keys
+
+# ------------------------
+# Name Embedding Index
+# ------------------------
+
+class NameIndex:
+    """
+    Blocked nearest-neighbour index over L2-normalized name embeddings.
+
+    Vectors live in an append-only float32 file that is memory-mapped for
+    queries; each identity is listed under its DOB and pincode blocks, and a
+    query only scores the rows of the blocks it shares. Blocks larger than
+    `hnsw_threshold` get a FAISS HNSW graph when faiss is installed.
+
+    <dir>/vectors.f32           (rows, dim) float32
+    <dir>/meta.jsonl            append log: id, blocks, owner per row
+    <dir>/snapshot.json         rows and meta.jsonl bytes covered by the snapshot
+    <dir>/ids.S32.<rows>        snapshot arrays, memory-mapped on open:
+    <dir>/owners.S64.<rows>       record id and aadhaar hash per row,
+    <dir>/block_keys.u64.<rows>   sorted blocking-key hashes,
+    <dir>/block_offsets.i64.<rows>  and the CSR row lists they point into
+    <dir>/block_rows.i64.<rows>
+
+    Opening the index only parses the meta.jsonl lines written after the
+    last `compact()`, so a scorer process starts in constant time.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    META_FILE = "meta.jsonl"
+    SNAPSHOT_FILE = "snapshot.json"
+    OWNER_WIDTH = 64  # sha256 hex
+
+    def __init__(self, index_dir, dim=EMBEDDING_DIM, hnsw_threshold=50000):
+        self.index_dir = index_dir
+        self.dim = dim
+        self.hnsw_threshold = hnsw_threshold
+
+        self.base_rows = 0      # rows covered by the snapshot arrays
+        self._meta_offset = 0   # meta.jsonl bytes covered by the snapshot
+        self._snapshot = {}     # snapshot array name -> np.memmap
+        self.ids = []           # tail row -> record id
+        self.owners = []        # tail row -> aadhaar hash (to skip self-matches)
+        self.blocks = {}        # blocking key -> [tail rows]
+        self._block_rows = {}   # blocking key -> np.ndarray cache
+        self._hnsw = {}         # blocking key -> faiss index
+        self._vectors = None
+        self._mapped_rows = 0
+
+        os.makedirs(index_dir, exist_ok=True)
+        self._vectors_path = os.path.join(index_dir, self.VECTORS_FILE)
+        self._meta_path = os.path.join(index_dir, self.META_FILE)
+        self._snapshot_path = os.path.join(index_dir, self.SNAPSHOT_FILE)
+        self._load_snapshot()
+        self._load_meta()
+
+    # ---- on-disk layout ----
+
+    def _snapshot_arrays(self, rows):
+        return {
+            "ids": (f"ids.S{ID_WIDTH}.{rows}", f"S{ID_WIDTH}"),
+            "owners": (f"owners.S{self.OWNER_WIDTH}.{rows}", f"S{self.OWNER_WIDTH}"),
+            "block_keys": (f"block_keys.u64.{rows}", np.uint64),
+            "block_offsets": (f"block_offsets.i64.{rows}", np.int64),
+            "block_rows": (f"block_rows.i64.{rows}", np.int64),
+        }
+
+    def _load_snapshot(self):
+        if not os.path.exists(self._snapshot_path):
+            return
+        with open(self._snapshot_path, "r") as f:
+            header = json.load(f)
+        self.base_rows = header["rows"]
+        self._meta_offset = header["meta_bytes"]
+        for name, (filename, dtype) in self._snapshot_arrays(self.base_rows).items():
+            path = os.path.join(self.index_dir, filename)
+            if os.path.getsize(path) == 0:
+                self._snapshot[name] = np.empty(0, dtype=dtype)
+            else:
+                self._snapshot[name] = np.memmap(path, dtype=dtype, mode="r")
+
+    def _load_meta(self):
+        if not os.path.exists(self._meta_path):
+            return
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            f.seek(self._meta_offset)
+            for line in f:
+                if line.strip():
+                    self._register(json.loads(line))
+        # A crash between the two appends can leave a trailing vector
+        # without metadata; only the rows with metadata are trusted
+        expected = len(self) * self.dim * 4
+        if os.path.exists(self._vectors_path) and os.path.getsize(self._vectors_path) > expected:
+            with open(self._vectors_path, "r+b") as f:
+                f.truncate(expected)
+
+    def _register(self, meta):
+        row = len(self)
+        self.ids.append(meta["id"])
+        self.owners.append(meta.get("owner"))
+        for key in meta["blocks"]:
+            self.blocks.setdefault(key, []).append(row)
+            self._block_rows.pop(key, None)
+            self._hnsw.pop(key, None)
+        return row
+
+    def __len__(self):
+        return self.base_rows + len(self.ids)
+
+    def record_id(self, row):
+        if row < self.base_rows:
+            return self._snapshot["ids"][row].decode("utf-8")
+        return self.ids[row - self.base_rows]
+
+    def owner(self, row):
+        if row < self.base_rows:
+            return self._snapshot["owners"][row].decode("utf-8") or None
+        return self.owners[row - self.base_rows]
+
+    def _mapped(self):
+        if self._vectors is None or self._mapped_rows != len(self):
+            if not len(self):
+                return np.empty((0, self.dim), dtype=np.float32)
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r",
+                                      shape=(len(self), self.dim))
+            self._mapped_rows = len(self)
+        return self._vectors
+
+    # ---- writes ----
+
+    def add(self, record_ids, embeddings, block_keys, owners=None):
+        """
+        Append identities. `embeddings` is an (n, dim) array, `block_keys`
+        a list of blocking-key lists, one per identity.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.maximum(norms, 1e-12)
+        owners = owners or [None] * len(record_ids)
+        # Reject ids / owners the snapshot arrays could not hold before anything is written
+        encode_ids(record_ids)
+        self._encode_owners(owners)
+
+        with open(self._vectors_path, "ab") as vf:
+            vf.write(np.ascontiguousarray(embeddings).tobytes())
+        with open(self._meta_path, "a", encoding="utf-8") as mf:
+            for rid, keys, owner in zip(record_ids, block_keys, owners):
+                meta = {"id": str(rid), "blocks": list(keys), "owner": owner}
+                mf.write(json.dumps(meta) + "\n")
+                self._register(meta)
+
+    def _encode_owners(self, owners):
+        encoded = [(o or "").encode("utf-8") for o in owners]
+        for raw in encoded:
+            if len(raw) > self.OWNER_WIDTH:
+                raise ValueError(f"Owner hash {raw.decode('utf-8')!r} is longer than {self.OWNER_WIDTH} bytes")
+        return np.array(encoded, dtype=f"S{self.OWNER_WIDTH}")
+
+    def compact(self):
+        """
+        Fold the meta.jsonl tail into new snapshot arrays. The arrays are
+        written under new names and snapshot.json is swapped in last, so a
+        reader or a crash only ever sees a complete snapshot.
+        """
+        if not self.ids:
+            return
+        rows = len(self)
+        tail_ids = encode_ids(self.ids)
+        tail_owners = self._encode_owners(self.owners)
+        tail_pairs = [(_key_hash(key), row) for key, key_rows in self.blocks.items() for row in key_rows]
+        tail_keys = np.array([k for k, _ in tail_pairs], dtype=np.uint64)
+        tail_rows = np.array([r for _, r in tail_pairs], dtype=np.int64)
+
+        if self.base_rows:
+            base = self._snapshot
+            counts = np.diff(base["block_offsets"])
+            keys = np.concatenate([np.repeat(base["block_keys"], counts), tail_keys])
+            key_rows = np.concatenate([base["block_rows"], tail_rows])
+            ids = np.concatenate([base["ids"], tail_ids])
+            owners = np.concatenate([base["owners"], tail_owners])
+        else:
+            keys, key_rows, ids, owners = tail_keys, tail_rows, tail_ids, tail_owners
+
+        order = np.lexsort((key_rows, keys))
+        keys, key_rows = keys[order], key_rows[order]
+        unique_keys, starts = np.unique(keys, return_index=True)
+        offsets = np.append(starts, len(keys)).astype(np.int64)
+
+        arrays = {"ids": ids, "owners": owners, "block_keys": unique_keys,
+                  "block_offsets": offsets, "block_rows": key_rows}
+        for name, (filename, dtype) in self._snapshot_arrays(rows).items():
+            with open(os.path.join(self.index_dir, filename), "wb") as f:
+                f.write(np.ascontiguousarray(arrays[name], dtype=dtype).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        previous = self.base_rows
+        header = {"rows": rows, "meta_bytes": os.path.getsize(self._meta_path)}
+        tmp = self._snapshot_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(header, f)
+        os.replace(tmp, self._snapshot_path)
+        if previous:
+            for filename, _ in self._snapshot_arrays(previous).values():
+                os.remove(os.path.join(self.index_dir, filename))
+
+        self._snapshot = {}
+        self.ids, self.owners, self.blocks = [], [], {}
+        self._block_rows.clear()
+        self._load_snapshot()
+
+    # ---- queries ----
+
+    def _rows_for(self, key):
+        rows = self._block_rows.get(key)
+        if rows is None:
+            rows = np.asarray(self.blocks.get(key, ()), dtype=np.int64)
+            if self.base_rows:
+                keys = self._snapshot["block_keys"]
+                h = np.uint64(_key_hash(key))
+                pos = int(np.searchsorted(keys, h))
+                if pos < len(keys) and keys[pos] == h:
+                    offsets = self._snapshot["block_offsets"]
+                    base = self._snapshot["block_rows"][offsets[pos]:offsets[pos + 1]]
+                    rows = np.concatenate([base, rows])
+            self._block_rows[key] = rows
+        return rows
+
+    def _hnsw_for(self, key, rows, vectors):
+        index = self._hnsw.get(key)
+        if index is None:
+            index = faiss.IndexHNSWFlat(self.dim, 32, faiss.METRIC_INNER_PRODUCT)
+            index.add(np.ascontiguousarray(vectors[rows]))
+            self._hnsw[key] = index
+        return index
+
+    def _search_block(self, key, query, k, vectors):
+        rows = self._rows_for(key)
+        if rows.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        if faiss is not None and rows.size > self.hnsw_threshold:
+            sims, local = self._hnsw_for(key, rows, vectors).search(query[None, :], k)
+            keep = local[0] >= 0
+            return rows[local[0][keep]], sims[0][keep]
+        sims = vectors[rows] @ query
+        if sims.size > k:
+            top = np.argpartition(-sims, k - 1)[:k]
+            return rows[top], sims[top]
+        return rows, sims
+
+    def query(self, embedding, block_keys, k=10, exclude_owner=None):
+        """
+        Top-k most similar identities sharing any of `block_keys`.
+        Returns a list of (record_id, similarity, block_key), best first.
+        """
+        vectors = self._mapped()
+        query = np.asarray(embedding, dtype=np.float32).reshape(self.dim)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        best = {}
+        for key in block_keys:
+            rows, sims = self._search_block(key, query, k + 1, vectors)
+            for row, sim in zip(rows.tolist(), sims.tolist()):
+                if exclude_owner is not None and self.owner(row) == exclude_owner:
+                    continue
+                if row not in best or sim > best[row][0]:
+                    best[row] = (sim, key)
+
+        ranked = sorted(best.items(), key=lambda item: -item[1][0])[:k]
+        return [(self.record_id(row), sim, key) for row, (sim, key) in ranked]
+
+def _key_hash(key):
+    """Stable 64-bit hash of a blocking key (Python's hash() is salted per process)."""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+# ------------------------
+# Build from extracted records
+# ------------------------
+
+def index_fields(record):
+    """
+    (name, dob, address, owner) from either a flat record (OCR results, the
+    cleaned dataset, fraud inputs) or a KYCRequest export, whose fields sit
+    under extractedData / userInfo.
+    """
+    extracted = record.get("extractedData") or {}
+    user_info = record.get("userInfo") or {}
+    name = (record.get("name") or record.get("name_on_doc")
+            or extracted.get("name") or user_info.get("fullName"))
+    dob = record.get("dob") or extracted.get("dob") or user_info.get("dob")
+    address = record.get("address") or extracted.get("address")
+    return name, dob, address, record.get("aadhaarHash")
+
+def build_index(records, index_dir, encode, batch_size=1024, normalize=None):
+    """
+    records: iterable of dicts, flat or KYCRequest exports (see index_fields)
+    encode: callable(list[str]) -> (n, dim) array, e.g. the scorer's SentenceTransformer
+    normalize: applied to each name before encoding, e.g. fraudScoring.normalize_name
+    """
+    index = NameIndex(index_dir)
+    batch = []
+
+    def flush():
+        if not batch:
+            return
+        names = [r["name"] for r in batch]
+        index.add(
+            [r["id"] for r in batch],
+            encode(names),
+            [r["blocks"] for r in batch],
+            owners=[r["owner"] for r in batch],
+        )
+        batch.clear()
+
+    for i, rec in enumerate(records):
+        name, dob, address, owner = index_fields(rec)
+        keys = blocking_keys(dob, extract_pincode(address))
+        if normalize is not None and name:
+            name = normalize(name)
+        if not name or not keys:
+            continue
+        batch.append({
+            "id": record_id_of(rec) if "_id" in rec else rec.get("id") or rec.get("file") or i,
+            "name": name,
+            "blocks": keys,
+            "owner": owner,
+        })
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    index.compact()
+    return index
+
+# ------------------------
+# Entry Point
+# ------------------------
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python name_index.py <records.json|.jsonl> <index_dir>")
+        sys.exit(1)
+
+    from backend.scripts.fraudScoring import nlp_model, normalize_name
+
+    encode = lambda names: nlp_model.encode(names, batch_size=256, normalize_embeddings=True)
+    index = build_index(iter_records(sys.argv[1]), sys.argv[2], encode, normalize=normalize_name)
+    print(f"✅ Indexed {len(index)} identities in {sys.argv[2]}")
@@ -1,4 +1,5 @@
 import os
+import sys
 import random
 import numpy as np
 import torch
@@ -13,6 +14,11 @@ from sklearn.metrics import classification_report
 import networkx as nx
 import matplotlib.pyplot as plt
 
+# Add project root to sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
 # ------------------------
 # Load environment variables
 # ------------------------
@@ -66,12 +72,74 @@ def hash_to_features(hash_str, dims=8):
                 nums.append(0)
     return nums
 
+# ------------------------
+# Batched graphs
+# ------------------------
+def collate_graph_batch(features, edge_index, labels=None):
+    """
+    One disjoint-union graph for a (B, nodes, dims) feature block, so B
+    documents that share `edge_index` go through the GNN in one forward pass.
+    """
+    x = torch.as_tensor(features)
+    num_graphs, num_nodes = x.shape[0], x.shape[1]
+    offsets = torch.arange(num_graphs, dtype=torch.long).repeat_interleave(edge_index.size(1)) * num_nodes
+    data = Data(
+        x=x.reshape(-1, x.shape[2]),
+        edge_index=edge_index.repeat(1, num_graphs) + offsets,
+        batch=torch.arange(num_graphs, dtype=torch.long).repeat_interleave(num_nodes),
+    )
+    if labels is not None:
+        data.y = torch.as_tensor(labels)
+    return data
+
+class StoreBatchLoader:
+    """
+    DataLoader stand-in for the feature-store path: every batch is a
+    contiguous slice of store rows collated into one graph, with no per-row
+    Python work. Shuffling reorders whole batches, not rows.
+    """
+
+    def __init__(self, features, labels, starts, batch_size, edge_index, shuffle=False):
+        self.features = features
+        self.labels = labels
+        self.starts = list(starts)
+        self.batch_size = batch_size
+        self.edge_index = edge_index
+        self.shuffle = shuffle
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        order = torch.randperm(len(self.starts)).tolist() if self.shuffle else range(len(self.starts))
+        for i in order:
+            start = self.starts[i]
+            stop = start + self.batch_size
+            yield collate_graph_batch(self.features[start:stop], self.edge_index, self.labels[start:stop])
+
 # ------------------------
 # Custom Dataset
 # ------------------------
 class FraudGraphDataset(Dataset):
-    def __init__(self, collection, root=None):
+    """
+    Reads records straight from MongoDB, or from a memory-mapped
+    FeatureStore (schema "identity_hash") when `store` is given, in which
+    case rows are sliced zero-copy and nothing is loaded up front; use
+    `store_loaders` to train on whole slices instead of per-row Data objects.
+    """
+    EDGE_INDEX = torch.tensor([[0, 0, 1], [1, 2, 0]], dtype=torch.long)
+
+    def __init__(self, collection=None, root=None, store=None):
         super().__init__(root)
+        self.store = None
+        if store is not None:
+            from backend.ai.feature_store import FeatureStore
+            self.store = store if isinstance(store, FeatureStore) else FeatureStore(store, schema="identity_hash")
+            self.features = self.store.torch_features()
+            self.labels = self.store.torch_labels()
+            print(f"📦 Mapped {len(self.store)} records from feature store.")
+            return
+
         self.records = list(collection.find({
             "aadhaarHash": {"$exists": True, "$ne": None},
             "panHash": {"$exists": True, "$ne": None}
@@ -79,9 +147,14 @@ class FraudGraphDataset(Dataset):
         print(f"📦 Loaded {len(self.records)} records from MongoDB.")
 
     def __len__(self):
+        if self.store is not None:
+            return len(self.store)
         return len(self.records)
 
     def __getitem__(self, idx):
+        if self.store is not None:
+            return Data(x=self.features[idx], edge_index=self.EDGE_INDEX, y=self.labels[idx].view(1))
+
         record = self.records[idx]
         aadhaar_hash = record.get("aadhaarHash", "")
         pan_hash = record.get("panHash", "")
@@ -90,11 +163,20 @@ class FraudGraphDataset(Dataset):
         pan_feats = hash_to_features(pan_hash)
 
         x = torch.tensor([user_feats, aadhaar_feats, pan_feats], dtype=torch.float)
-        edge_index = torch.tensor([[0, 0, 1], [1, 2, 0]], dtype=torch.long)
+        edge_index = self.EDGE_INDEX
         is_fraud = 1 if record.get("fraudInfo") and len(record["fraudInfo"]) > 0 else 0
         y = torch.tensor([is_fraud], dtype=torch.long)
         return Data(x=x, edge_index=edge_index, y=y)
 
+    def store_loaders(self, batch_size=16, train_fraction=0.8):
+        """Train / test StoreBatchLoaders over a random split of contiguous batches."""
+        starts = torch.arange(0, len(self), batch_size)
+        starts = starts[torch.randperm(len(starts))].tolist()
+        cut = int(train_fraction * len(starts))
+        make = lambda part, shuffle: StoreBatchLoader(self.features, self.labels, part, batch_size,
+                                                      self.EDGE_INDEX, shuffle=shuffle)
+        return make(starts[:cut], True), make(sorted(starts[cut:]), False)
+
 # ------------------------
 # Visualize graph
 # ------------------------
@@ -159,10 +241,12 @@ def evaluate(model, loader, device):
 # ------------------------
 # Training Function
 # ------------------------
-def train():
+def train(store_path=None, batch_size=16):
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    collection = get_mongo_collection()
-    dataset = FraudGraphDataset(collection)
+    if store_path:
+        dataset = FraudGraphDataset(store=store_path)
+    else:
+        dataset = FraudGraphDataset(get_mongo_collection())
 
     if len(dataset) == 0:
         print("⚠️ No data found in MongoDB collection.")
@@ -171,13 +255,16 @@ def train():
     # Visualize the first graph sample
     visualize_graph(dataset[0])
 
-    from torch.utils.data import random_split
-    train_size = int(0.8 * len(dataset))
-    test_size = len(dataset) - train_size
-    train_dataset, test_dataset = random_split(dataset, [train_size, test_size])
+    if dataset.store is not None:
+        train_loader, test_loader = dataset.store_loaders(batch_size)
+    else:
+        from torch.utils.data import random_split
+        train_size = int(0.8 * len(dataset))
+        test_size = len(dataset) - train_size
+        train_dataset, test_dataset = random_split(dataset, [train_size, test_size])
 
-    train_loader = DataLoader(train_dataset, batch_size=16, shuffle=True)
-    test_loader = DataLoader(test_dataset, batch_size=16)
+        train_loader = DataLoader(train_dataset, batch_size=batch_size, shuffle=True)
+        test_loader = DataLoader(test_dataset, batch_size=batch_size)
 
     model = DocumentGNN(in_feats=dataset[0].x.shape[1]).to(device)
     optimizer = torch.optim.Adam(model.parameters(), lr=0.01)
@@ -211,5 +298,8 @@ def train():
 # Entry Point
 # ------------------------
 if __name__ == "__main__":
-    test_mongo_connection()
-    train()
+    # Optional: path to a feature store built by feature_store.py
+    store_path = sys.argv[1] if len(sys.argv) > 1 else None
+    if store_path is None:
+        test_mongo_connection()
+    train(store_path)
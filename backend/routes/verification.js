@@ -96,6 +96,8 @@ router.post("/verify-doc", upload.single("documentImage"), async (req, res) => {
       name_similarity_score: nameSimilarityScore,
       name_on_doc: nameOnDoc,
       name_input: userName || "",
+      dob: extractedData?.dob || "",
+      address: extractedData?.address || "",
       type: documentType,
     };
 
@@ -0,0 +1,288 @@
+import os
+import sys
+import json
+import time
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# Add project root to sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# ------------------------
+# Manifest
+# ------------------------
+#
+# One JSON object per line:
+#   {"id": "...", "input": <base64 fraud input or object>, "image_path": "...",
+#    "previous": {"fraud_score": 42, "risk_level": "Medium"}}
+#
+# "previous" also accepts the camelCase fraudScore / riskLevel stored in
+# KYC fraudInfo entries; "id" defaults to the line number. Checkpoints are
+# keyed on "id", so give entries stable ids if the manifest may be regenerated.
+
+def iter_manifest(path, skip=()):
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            entry["line"] = line_no
+            entry.setdefault("id", line_no)
+            if entry["id"] in skip:
+                continue
+            yield entry
+
+def previous_score(entry):
+    prev = entry.get("previous") or {}
+    level = prev.get("risk_level", prev.get("riskLevel"))
+    score = prev.get("fraud_score", prev.get("fraudScore"))
+    return level, score
+
+# ------------------------
+# Worker side
+# ------------------------
+
+def _init_worker(threads):
+    # Replayed history must never be re-recorded as live traffic
+    os.environ.pop("FRAUD_RECORD_DIR", None)
+    import torch
+    torch.set_num_threads(threads)
+    # Loads the sentence model and GNN once per worker process
+    from backend.scripts import fraudScoring  # noqa: F401
+
+def _base_row(entry):
+    prev_level, prev_score = previous_score(entry)
+    return {
+        "line": entry["line"],
+        "id": entry["id"],
+        "previous_risk_level": prev_level,
+        "previous_fraud_score": prev_score,
+    }
+
+def _score_chunk(entries):
+    from backend.scripts import fraudScoring
+
+    rows = []
+    for entry in entries:
+        row = _base_row(entry)
+        try:
+            result = fraudScoring.score_request(entry)
+            row.update(risk_level=result["risk_level"], fraud_score=result["fraud_score"],
+                       reasons=result.get("reasons", []))
+        except Exception as exc:
+            row["error"] = f"{type(exc).__name__}: {exc}"
+        rows.append(row)
+    return rows
+
+# ------------------------
+# Checkpointed output
+# ------------------------
+
+def load_checkpoint(output_path):
+    """
+    Ids already scored successfully in a previous run; rows that ended in
+    an error are retried. A torn last line (the run was killed mid-write)
+    is cut off so appending continues cleanly.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r+", encoding="utf-8") as f:
+        good_end = 0
+        for line in iter(f.readline, ""):
+            if not line.endswith("\n"):
+                break
+            try:
+                row = json.loads(line)
+                row_id = row["id"]
+            except (ValueError, KeyError):
+                break
+            if "error" in row:
+                done.discard(row_id)
+            else:
+                done.add(row_id)
+            good_end = f.tell()
+        f.truncate(good_end)
+    return done
+
+def _shard_rows(future, chunk):
+    """Rows for a finished shard, or error rows (retried on resume) if its worker died."""
+    try:
+        return future.result(), False
+    except BrokenProcessPool as exc:
+        return [dict(_base_row(entry), error=f"BrokenProcessPool: {exc}") for entry in chunk], True
+
+def rescore(manifest, output_path, workers=None, threads_per_worker=1, chunk_size=16,
+            fsync_every=5.0):
+    done = load_checkpoint(output_path)
+    if done:
+        print(f"↩️ Resuming: {len(done)} entries already scored in {output_path}", file=sys.stderr)
+
+    workers = workers or os.cpu_count() or 1
+    pending = {}   # future -> shard entries
+    written = 0
+    started = last_sync = time.monotonic()
+    entries = iter_manifest(manifest, skip=done)
+
+    def next_chunk():
+        chunk = []
+        for entry in entries:
+            chunk.append(entry)
+            if len(chunk) >= chunk_size:
+                break
+        return chunk
+
+    def new_pool():
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(threads_per_worker,))
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "a", encoding="utf-8") as out:
+        pool = new_pool()
+
+        def write(rows):
+            nonlocal written
+            for row in rows:
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                written += 1
+
+        try:
+            exhausted = False
+            while True:
+                # Keep a bounded number of shards in flight; the manifest is never fully loaded
+                while not exhausted and len(pending) < workers * 2:
+                    chunk = next_chunk()
+                    if not chunk:
+                        exhausted = True
+                        break
+                    pending[pool.submit(_score_chunk, chunk)] = chunk
+                if not pending:
+                    break
+
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in finished:
+                    rows, lost = _shard_rows(future, pending.pop(future))
+                    write(rows)
+                    broken |= lost
+                if broken:
+                    # A worker died (OOM, segfault): every shard still on this pool
+                    # fails with it, so record them as errors and start a fresh pool
+                    for future in wait(pending).done:
+                        write(_shard_rows(future, pending.pop(future))[0])
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    print("⚠️ A worker process died; failed shards are recorded as errors "
+                          "and retried on the next run. Restarting the pool.", file=sys.stderr)
+                    pool = new_pool()
+                out.flush()
+                if time.monotonic() - last_sync >= fsync_every:
+                    os.fsync(out.fileno())
+                    last_sync = time.monotonic()
+                    rate = written / max(last_sync - started, 1e-9)
+                    print(f"📈 {written} scored this run ({rate:.1f}/s)", file=sys.stderr)
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            out.flush()
+            os.fsync(out.fileno())
+            print(f"⏸️ Interrupted after {written} entries; rerun the same command to resume.",
+                  file=sys.stderr)
+            raise
+        pool.shutdown()
+        os.fsync(out.fileno())
+    return written
+
+# ------------------------
+# Summary
+# ------------------------
+
+RISK_ORDER = {"Low": 0, "Medium": 1, "High": 2}
+
+def _latest_rows(output_path):
+    """Last row written for each id, so retried entries count once."""
+    latest = {}
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            row.pop("reasons", None)
+            latest[row["id"]] = row
+    return latest.values()
+
+def summarize(output_path):
+    """Risk-level transitions vs the previously stored scores, over the whole output file."""
+    transitions = Counter()
+    totals = Counter()
+    score_deltas = []
+    for row in _latest_rows(output_path):
+        totals["scored"] += 1
+        if "error" in row:
+            totals["errors"] += 1
+            continue
+        prev, new = row.get("previous_risk_level"), row["risk_level"]
+        if prev is None:
+            totals["no_previous"] += 1
+            continue
+        transitions[f"{prev} -> {new}"] += 1
+        if prev == new:
+            totals["unchanged"] += 1
+        elif RISK_ORDER.get(new, -1) > RISK_ORDER.get(prev, -1):
+            totals["escalated"] += 1
+        else:
+            totals["downgraded"] += 1
+        if row.get("previous_fraud_score") is not None:
+            score_deltas.append(row["fraud_score"] - row["previous_fraud_score"])
+
+    compared = totals["unchanged"] + totals["escalated"] + totals["downgraded"]
+    return {
+        "scored": totals["scored"],
+        "errors": totals["errors"],
+        "no_previous": totals["no_previous"],
+        "compared": compared,
+        "unchanged": totals["unchanged"],
+        "escalated": totals["escalated"],
+        "downgraded": totals["downgraded"],
+        "changed_rate": round((compared - totals["unchanged"]) / compared, 4) if compared else 0.0,
+        "mean_score_delta": round(sum(score_deltas) / len(score_deltas), 2) if score_deltas else 0.0,
+        "transitions": dict(sorted(transitions.items())),
+    }
+
+def print_summary(summary):
+    print(f"📊 Re-scored {summary['scored']} submissions ({summary['errors']} errors, "
+          f"{summary['no_previous']} without a stored score)")
+    print(f"   unchanged {summary['unchanged']} | escalated {summary['escalated']} | "
+          f"downgraded {summary['downgraded']} | changed {summary['changed_rate'] * 100:.1f}% | "
+          f"mean score delta {summary['mean_score_delta']:+}")
+    levels = sorted(RISK_ORDER, key=RISK_ORDER.get)
+    print("   " + "previous / new".rjust(16) + "".join(f"{lvl:>9}" for lvl in levels))
+    for prev in levels:
+        counts = [summary["transitions"].get(f"{prev} -> {new}", 0) for new in levels]
+        print(f"   {prev:>16}" + "".join(f"{c:>9}" for c in counts))
+
+# ------------------------
+# Main Entry Point
+# ------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score historical submissions in parallel.")
+    parser.add_argument("manifest", help="JSONL of fraud inputs, image paths and previous scores")
+    parser.add_argument("--output", default="data/processed/rescore_results.jsonl",
+                        help="results JSONL; also the checkpoint a rerun resumes from")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=16, help="entries per shard sent to a worker")
+    parser.add_argument("--summary", help="also write the summary as JSON")
+    args = parser.parse_args()
+
+    try:
+        rescore(args.manifest, args.output, args.workers, args.threads_per_worker, args.chunk_size)
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+    summary = summarize(args.output)
+    print_summary(summary)
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(summary, f, indent=2)
@@ -1,8 +1,13 @@
 import sys
+import gc
 import json
 import base64
+import argparse
 import cv2
 import re
+import time
+import numpy as np
+import hashlib
 import torch
 import torch.nn.functional as F
 from torch_geometric.data import Data
@@ -14,62 +19,17 @@ import os
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
-# ------------------------
-# Verhoeff Checksum Tables
-# ------------------------
-
-mul_table = [
-    [0,1,2,3,4,5,6,7,8,9],
-    [1,2,3,4,0,6,7,8,9,5],
-    [2,3,4,0,1,7,8,9,5,6],
-    [3,4,0,1,2,8,9,5,6,7],
-    [4,0,1,2,3,9,5,6,7,8],
-    [5,9,8,7,6,0,4,3,2,1],
-    [6,5,9,8,7,1,0,4,3,2],
-    [7,6,5,9,8,2,1,0,4,3],
-    [8,7,6,5,9,3,2,1,0,4],
-    [9,8,7,6,5,4,3,2,1,0]
-]
-
-perm_table = [
-    [0,1,2,3,4,5,6,7,8,9],
-    [1,5,7,6,2,8,3,0,9,4],
-    [5,8,0,3,7,9,6,1,4,2],
-    [8,9,1,6,0,4,3,5,2,7],
-    [9,4,5,3,1,2,6,8,7,0],
-    [4,2,8,6,5,7,3,9,0,1],
-    [2,7,9,3,8,0,6,4,1,5],
-    [7,0,4,6,9,1,3,2,5,8]
-]
-
-def verhoeff_check(num):
-    c = 0
-    num = str(num)[::-1]
-    for i, item in enumerate(num):
-        c = mul_table[c][perm_table[i % 8][int(item)]]
-    return c == 0
+from backend.scripts.verhoeff import verhoeff_check
 
 # ------------------------
 # Tampering Detection
 # ------------------------
+# Lives in its own module so process pools (kyc_pipeline's tamper stage)
+# can run it without loading the models below.
 
-def detect_document_tampering(image_path):
-    try:
-        image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
-        if image is None:
-            return False
-        image = cv2.GaussianBlur(image, (5, 5), 0)
-
-        # Edge detection with higher threshold to ignore text noise
-        edges = cv2.Canny(image, 250, 300)
-
-        # Use contour area instead of just count
-        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        large_contours = [cnt for cnt in contours if cv2.contourArea(cnt) > 500]
-
-        return len(large_contours) > 10  # Only flag if there are many large, irregular patches
-    except Exception:
-        return False
+from backend.scripts.tampering import (
+    TAMPERING_CASCADE, detect_document_tampering, tampering_cascade_stats, tampering_escalation_rate,
+)
 
 # ------------------------
 # NLP for Name Similarity
@@ -84,6 +44,9 @@ def normalize_name(name):
     return name
 
 def compute_name_similarity(name_from_doc, name_from_user):
+    if name_batcher is not None:
+        return name_batcher((name_from_doc, name_from_user))
+
     if not name_from_doc or not name_from_user:
         return 0.0
 
@@ -102,6 +65,36 @@ def compute_name_similarity(name_from_doc, name_from_user):
 
     return similarity
 
+def compute_name_similarity_batch(pairs):
+    """compute_name_similarity over many (doc name, user name) pairs with one encoder call."""
+    normalized = [(normalize_name(a), normalize_name(b)) if a and b else None for a, b in pairs]
+    texts = sorted({name for pair in normalized if pair and pair[0] != pair[1] for name in pair})
+    sims = []
+    if texts:
+        position = {name: i for i, name in enumerate(texts)}
+        embeddings = nlp_model.encode(texts, convert_to_tensor=True)
+        to_score = [pair for pair in normalized if pair and pair[0] != pair[1]]
+        sims = F.cosine_similarity(
+            embeddings[[position[a] for a, _ in to_score]],
+            embeddings[[position[b] for _, b in to_score]],
+        ).tolist()
+    sims = iter(sims)
+
+    scores = []
+    for pair in normalized:
+        if pair is None:
+            scores.append(0.0)
+            continue
+        doc_name, user_name = pair
+        if doc_name == user_name:
+            scores.append(1.0)
+            continue
+        similarity = next(sims)
+        if similarity > 0.65 and (doc_name in user_name or user_name in doc_name):
+            similarity = 1.0
+        scores.append(similarity)
+    return scores
+
 # ------------------------
 # Document GNN Model
 # ------------------------
@@ -126,7 +119,9 @@ class DocumentGNN(torch.nn.Module):
 # Import model from package
 # ------------------------
 
-from backend.ai.train_gnn import DocumentGNN
+from backend.ai.train_gnn import DocumentGNN, collate_graph_batch
+from backend.ai.name_index import NameIndex, blocking_keys, extract_pincode
+from backend.ai.feature_store import document_features_batch
 
 # ------------------------
 # Load model
@@ -144,52 +139,139 @@ model.eval()
 # Build Graph from Document Data
 # ------------------------
 
+# Fully connected 4-node graph: name_on_doc, aadhaar_number, pan_number, type
+DOCUMENT_EDGE_INDEX = torch.tensor([
+    [0, 0, 0, 1, 1, 2, 2, 3, 3, 1, 2, 3],
+    [1, 2, 3, 0, 2, 0, 1, 0, 1, 3, 3, 1]
+], dtype=torch.long)
+
 def build_graph_from_document(data):
     """
     Build graph based on extracted document features.
-    Here we encode presence of fields and their length as features.
-    Adapt this for your real document structure.
+    Here we encode presence of fields and their length as features
+    (see feature_store.document_features_batch).
     """
-    # Features: [field_presence, normalized_length, dummy_feature]
-    def feat(val):
-        if val:
-            length = min(len(str(val)) / 50.0, 1.0)
-            # Example extra dummy features
-            return [1.0, length, 0.5, 0.1, 0.2, 0.3, 0.4, 0.6]
-        else:
-            return [0.0]*8
+    x = torch.from_numpy(document_features_batch([data])[0])
+    return Data(x=x, edge_index=DOCUMENT_EDGE_INDEX)
+
+def build_graph_batch(features):
+    """
+    One disjoint-union graph for a (B, 4, 8) feature block, so the GNN
+    scores B documents in a single forward pass.
+    """
+    return collate_graph_batch(features, DOCUMENT_EDGE_INDEX)
+
+def evaluate_structure_with_gnn_batch(records=None, features=None):
+    """Returns one bool per document; pass either fraud-input dicts or a feature block."""
+    if features is None:
+        features = document_features_batch(records)
+    if len(features) == 0:
+        return []
+    with torch.no_grad():
+        out = model(build_graph_batch(features))
+    return (torch.argmax(out, dim=1) == 1).tolist()
+
+def evaluate_structure_with_gnn(extracted_data):
+    if gnn_batcher is not None:
+        return gnn_batcher(extracted_data)
+    return evaluate_structure_with_gnn_batch([extracted_data])[0]
+
+def evaluate_feature_store(store, batch_size=65536):
+    """GNN verdicts for every row of a 'document_fields' FeatureStore, sliced without per-row Python work."""
+    verdicts = []
+    for _, features, _ in store.iter_batches(batch_size):
+        verdicts.extend(evaluate_structure_with_gnn_batch(features=features))
+    return verdicts
 
+# ------------------------
+# Micro-batching
+# ------------------------
+# When enabled, concurrent compute_name_similarity / evaluate_structure_with_gnn
+# calls from different threads are coalesced into one model call per batch.
 
-    features = [
-        feat(data.get("name_on_doc", None)),
-        feat(data.get("aadhaar_number", None)),
-        feat(data.get("pan_number", None)),
-        feat(data.get("type", None)),
-    ]
+name_batcher = None
+gnn_batcher = None
 
-    x = torch.tensor(features, dtype=torch.float)
+def enable_micro_batching(max_batch_size=32, max_wait_ms=5.0):
+    """Start the batch schedulers; call after fork, since threads do not survive it."""
+    global name_batcher, gnn_batcher
+    from backend.scripts.inference_batcher import MicroBatcher
 
-    # Define edges between these nodes (fully connected simple example)
-    edge_index = torch.tensor([
-        [0, 0, 0, 1, 1, 2, 2, 3, 3, 1, 2, 3],
-        [1, 2, 3, 0, 2, 0, 1, 0, 1, 3, 3, 1]
-    ], dtype=torch.long)
+    name_batcher = MicroBatcher(compute_name_similarity_batch, max_batch_size, max_wait_ms,
+                                name="name_similarity")
+    gnn_batcher = MicroBatcher(lambda records: evaluate_structure_with_gnn_batch(records),
+                               max_batch_size, max_wait_ms, name="gnn")
 
-    return Data(x=x, edge_index=edge_index)
+def disable_micro_batching():
+    global name_batcher, gnn_batcher
+    for batcher in (name_batcher, gnn_batcher):
+        if batcher is not None:
+            batcher.close()
+    name_batcher = gnn_batcher = None
 
-def evaluate_structure_with_gnn(extracted_data):
-    data = build_graph_from_document(extracted_data)
-    data.batch = torch.zeros(data.x.size(0), dtype=torch.long)  # batch vector (all zero for single graph)
-    with torch.no_grad():
-        out = model(data)
-    prediction = torch.argmax(out, dim=1).item()
-    return prediction == 1
+def micro_batching_stats():
+    return {b.name: b.stats() for b in (name_batcher, gnn_batcher) if b is not None}
+
+# ------------------------
+# Similar Identity Search
+# ------------------------
+
+NAME_INDEX_DIR = os.getenv("NAME_INDEX_DIR", os.path.join(AI_DIR, 'name_index'))
+name_index = None
+
+def get_name_index():
+    global name_index
+    if name_index is None and os.path.exists(os.path.join(NAME_INDEX_DIR, NameIndex.META_FILE)):
+        name_index = NameIndex(NAME_INDEX_DIR)
+    return name_index
+
+def _identity_query(data):
+    """(normalized name, blocking keys, aadhaar owner hash), or None if the record cannot be looked up."""
+    name = data.get("name_on_doc")
+    pincode = data.get("pincode") or extract_pincode(data.get("address"))
+    keys = blocking_keys(data.get("dob"), pincode)
+    if not name or not keys:
+        return None
+
+    # Same normalization + hash as the Node duplicate check
+    aadhaar = re.sub(r'\s+', '', str(data.get("aadhaar_number") or "")).upper()
+    owner = hashlib.sha256(aadhaar.encode()).hexdigest() if aadhaar else None
+    return normalize_name(name), keys, owner
+
+def find_similar_identities_batch(records, k=5, threshold=0.92):
+    """find_similar_identities for many documents with one encoder call."""
+    index = get_name_index()
+    queries = [_identity_query(data) for data in records] if index is not None else [None] * len(records)
+    names = [query[0] for query in queries if query is not None]
+    embeddings = iter(nlp_model.encode(names, normalize_embeddings=True) if names else ())
+
+    results = []
+    for query in queries:
+        if query is None:
+            results.append([])
+            continue
+        _, keys, owner = query
+        matches = index.query(next(embeddings), keys, k=k, exclude_owner=owner)
+        results.append([m for m in matches if m[1] >= threshold])
+    return results
+
+def find_similar_identities(data, k=5, threshold=0.92):
+    """
+    Existing applicants whose name embedding is close to this document's name
+    and who share its DOB or pincode block. Matches on the same Aadhaar are skipped.
+    """
+    return find_similar_identities_batch([data], k=k, threshold=threshold)[0]
 
 # ------------------------
 # Fraud Score Calculation
 # ------------------------
 
-def calculate_fraud_score(data, doc_type, image_path):
+def calculate_fraud_score(data, doc_type, image_path, structure_ok=None, name_similarity=None,
+                          similar=None):
+    """
+    structure_ok / name_similarity / similar: model outputs already computed
+    for this document by a batched caller (see kyc_pipeline.score_stage).
+    """
     score = 0
     reasons = []
 
@@ -212,17 +294,24 @@ def calculate_fraud_score(data, doc_type, image_path):
             reasons.append("Invalid PAN format.")
 
     # 🧪 3. Document tampering detection (very high risk)
-    if detect_document_tampering(image_path):
+    tampered = data.get("has_tampering_signs")
+    if tampered is None:
+        tampered = detect_document_tampering(image_path)
+    if tampered:
         score += 40
         reasons.append("Potential document manipulation detected.")
 
     # 🧠 4. Layout or structure anomaly via GNN
-    if not evaluate_structure_with_gnn(data):
+    if structure_ok is None:
+        structure_ok = evaluate_structure_with_gnn(data)
+    if not structure_ok:
         score += 25
         reasons.append("Anomalies detected in document structure.")
 
     # 🧍 5. Name mismatch (moderate risk — identity mismatch)
-    similarity = compute_name_similarity(data.get("name_on_doc", ""), data.get("name_input", ""))
+    similarity = name_similarity
+    if similarity is None:
+        similarity = compute_name_similarity(data.get("name_on_doc", ""), data.get("name_input", ""))
     if similarity < 0.9:
         if similarity < 0.7:
             score += 20
@@ -231,6 +320,16 @@ def calculate_fraud_score(data, doc_type, image_path):
             score += 10
             reasons.append("Minor discrepancy in name match.")
 
+    # 👥 6. Near-duplicate identity (synthetic identity indicator)
+    if similar is None:
+        similar = find_similar_identities(data)
+    if any(key.startswith("dob:") for _, _, key in similar):
+        score += 20
+        reasons.append("Similar name already registered with the same date of birth.")
+    elif similar:
+        score += 10
+        reasons.append("Similar name already registered at the same pincode.")
+
     # 🔚 Cap at 100 and assign risk level
     final_score = min(score, 100)
     risk_level = (
@@ -248,20 +347,52 @@ def calculate_fraud_score(data, doc_type, image_path):
 def evaluate_tampering_accuracy(test_data):
     """
     test_data: list of dicts like [{ "image_path": "path", "tampered": true }, ...]
+    Runs the full detector and the pre-screen cascade side by side and
+    reports accuracy, recall on tampered samples and throughput for each.
     """
-    correct = 0
+    items = [item for item in test_data
+             if item.get("image_path") is not None and item.get("tampered") is not None]
     total = len(test_data)
-    for item in test_data:
-        path = item.get("image_path")
-        expected = item.get("tampered")
-        if path is None or expected is None:
-            continue
-        predicted = detect_document_tampering(path)
-        if predicted == expected:
-            correct += 1
-    accuracy = correct / total if total > 0 else 0.0
-    print(f"📄 Tampering Detection Accuracy: {accuracy * 100:.2f}% ({correct}/{total})")
-    return accuracy
+    modes = (("full", False), ("cascade", True))
+
+    # Warm-up: read every image once so neither mode pays the cold-cache reads
+    for item in items:
+        cv2.imread(item["image_path"], cv2.IMREAD_GRAYSCALE)
+
+    # Run both modes on each image, alternating which goes first, and time each call
+    before = dict(tampering_cascade_stats)
+    counts = {label: {"correct": 0, "caught": 0, "elapsed": 0.0} for label, _ in modes}
+    positives = sum(1 for item in items if item["tampered"])
+    for n, item in enumerate(items):
+        for label, cascade in (modes if n % 2 == 0 else modes[::-1]):
+            start = time.perf_counter()
+            predicted = detect_document_tampering(item["image_path"], cascade=cascade)
+            counts[label]["elapsed"] += time.perf_counter() - start
+            counts[label]["correct"] += predicted == item["tampered"]
+            if item["tampered"]:
+                counts[label]["caught"] += predicted
+    screened = tampering_cascade_stats["screened"] - before["screened"]
+    escalated = tampering_cascade_stats["escalated"] - before["escalated"]
+
+    results = {}
+    for label, cascade in modes:
+        correct, caught, elapsed = (counts[label][k] for k in ("correct", "caught", "elapsed"))
+        results[label] = {
+            "accuracy": correct / total if total > 0 else 0.0,
+            "recall": caught / positives if positives else 0.0,
+            "docs_per_s": len(items) / elapsed if elapsed > 0 else 0.0,
+            "escalation_rate": (escalated / screened if screened else 1.0) if cascade else 1.0,
+        }
+        r = results[label]
+        print(f"📄 Tampering Detection [{label}] Accuracy: {r['accuracy'] * 100:.2f}% ({correct}/{total}) | "
+              f"Recall: {r['recall'] * 100:.2f}% | {r['docs_per_s']:.1f} docs/s | "
+              f"Escalated: {r['escalation_rate'] * 100:.1f}%")
+
+    if results["full"]["docs_per_s"] > 0:
+        speedup = results["cascade"]["docs_per_s"] / results["full"]["docs_per_s"]
+        recall_delta = results["cascade"]["recall"] - results["full"]["recall"]
+        print(f"⚡ Cascade speedup: {speedup:.2f}x, recall change: {recall_delta * 100:+.2f} pts")
+    return results["cascade" if TAMPERING_CASCADE else "full"]["accuracy"]
 
 
 def evaluate_name_matching_accuracy(test_data, threshold=0.9):
@@ -284,20 +415,110 @@ def evaluate_name_matching_accuracy(test_data, threshold=0.9):
     print(f"🧠 Name Matching Accuracy: {accuracy * 100:.2f}% ({correct}/{total})")
     return accuracy
 
+# ------------------------
+# Prefork Serving Mode
+# ------------------------
+
+def decode_fraud_input(payload):
+    if isinstance(payload, dict):
+        return dict(payload)
+    return json.loads(base64.b64decode(payload).decode('utf-8'))
+
+def score_request(request):
+    """
+    request: {"input": <base64 or dict>, "image_path": "..."}
+             or {"op": "stats"} for this worker's micro-batching stats
+    """
+    if request.get("op") == "stats":
+        return {"pid": os.getpid(), "micro_batching": micro_batching_stats()}
+
+    input_data = decode_fraud_input(request["input"])
+    image_path = request.get("image_path")
+
+    record_dir = os.getenv("FRAUD_RECORD_DIR")
+    if record_dir:
+        from backend.scripts.traffic_replay import record_request
+        try:
+            record_request(record_dir, input_data, image_path)
+        except (OSError, ValueError) as exc:
+            print(f"⚠️ Could not record request: {exc}", file=sys.stderr)
+
+    input_data["has_tampering_signs"] = detect_document_tampering(image_path)
+    return calculate_fraud_score(input_data, input_data.get('type'), image_path)
+
+def freeze_models():
+    """
+    Put the models in inference-only form before forking: eval mode, no
+    autograd, parameters moved to shared memory. gc.freeze() keeps the
+    collector from touching (and so copying) every inherited object page.
+    """
+    torch.set_grad_enabled(False)
+    for module in (model, nlp_model):
+        module.eval()
+        for param in module.parameters():
+            param.requires_grad_(False)
+        module.share_memory()
+    gc.collect()
+    gc.freeze()
+
+def reload_gnn_model():
+    global model
+    fresh = DocumentGNN(in_feats=8)
+    fresh.load_state_dict(torch.load(MODEL_PATH, map_location=torch.device('cpu')))
+    model = fresh
+    freeze_models()
+    print(f"🔁 Reloaded GNN weights from {MODEL_PATH}", file=sys.stderr)
+
+def make_worker_init(threads_per_worker, batch_size=0, batch_wait_ms=5.0):
+    def init_worker(index):
+        torch.set_num_threads(threads_per_worker)
+        if batch_size > 1:
+            enable_micro_batching(batch_size, batch_wait_ms)
+        if hasattr(os, "sched_setaffinity"):
+            cpus = sorted(os.sched_getaffinity(0))
+            start = (index * threads_per_worker) % len(cpus)
+            os.sched_setaffinity(0, {cpus[(start + i) % len(cpus)] for i in range(threads_per_worker)})
+    return init_worker
+
+def serve(argv):
+    from backend.scripts.prefork_server import PreforkPool
+
+    parser = argparse.ArgumentParser(prog="fraudScoring.py --serve")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--max-requests", type=int, default=1000,
+                        help="recycle a worker after this many requests; 0 never recycles")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="requests each worker handles at once (threads)")
+    parser.add_argument("--batch-size", type=int, default=0,
+                        help="micro-batch model calls across a worker's concurrent requests")
+    parser.add_argument("--batch-wait-ms", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    freeze_models()
+    pool = PreforkPool(
+        score_request,
+        workers=args.workers,
+        max_requests=args.max_requests,
+        init_worker=make_worker_init(args.threads_per_worker, args.batch_size, args.batch_wait_ms),
+        reload_fn=reload_gnn_model,
+        watch_paths=[MODEL_PATH],
+        concurrency=args.concurrency,
+    )
+    pool.serve()
+
 # ------------------------
 # Main Entry Point
 # ------------------------
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve":
+        serve(sys.argv[2:])
+        sys.exit(0)
+
     base64_input = sys.argv[1]
     image_path = sys.argv[2]
-    json_str = base64.b64decode(base64_input).decode('utf-8')
-    input_data = json.loads(json_str)
-    doc_type = input_data.get('type')
-
-    input_data["has_tampering_signs"] = detect_document_tampering(image_path)
-
-    result = calculate_fraud_score(input_data, doc_type, image_path)
+    result = score_request({"input": base64_input, "image_path": image_path})
     print(json.dumps(result, indent=2))
 
     # Optional evaluation files
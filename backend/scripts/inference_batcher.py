@@ -0,0 +1,196 @@
+import os
+import sys
+import time
+import queue
+import random
+import argparse
+import threading
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# ------------------------
+# Latency percentiles
+# ------------------------
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted sequence; 0.0 when empty."""
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[k]
+
+# ------------------------
+# Micro-batching Scheduler
+# ------------------------
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item calls into one batched call.
+
+    A background thread takes the first waiting item, then keeps collecting
+    until `max_batch_size` items are queued or `max_wait_ms` has passed
+    since that first item arrived, runs `batch_fn(items) -> results` once and
+    hands each caller its own result.
+
+    Queue-delay percentiles cover the most recent `delay_window` items, so a
+    long-running worker keeps bounded stats.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=32, max_wait_ms=5.0, name="batcher", delay_window=10000):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.batch_sizes = Counter()
+        self.queue_delays = deque(maxlen=delay_window)   # seconds from submit to batch start
+        self.max_queue_delay = 0.0                       # over every item ever served
+        self.batch_seconds = 0.0
+
+        self._thread = threading.Thread(target=self._run, name=f"{name}-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        future = Future()
+        if self._closed:
+            raise RuntimeError(f"{self.name} is closed")
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def __call__(self, item):
+        return self.submit(item).result()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                entry = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                self._queue.put(None)  # re-post so the loop exits after this batch
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            items = [entry[0] for entry in batch]
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"{self.name}: batch_fn returned {len(results)} results for {len(items)} items")
+            except Exception as exc:
+                for _, future, _ in batch:
+                    future.set_exception(exc)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+            finally:
+                with self._lock:
+                    self.batch_sizes[len(batch)] += 1
+                    delays = [started - entry[2] for entry in batch]
+                    self.queue_delays.extend(delays)
+                    self.max_queue_delay = max(self.max_queue_delay, max(delays))
+                    self.batch_seconds += time.perf_counter() - started
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        with self._lock:
+            delays = sorted(self.queue_delays)
+            sizes = dict(sorted(self.batch_sizes.items()))
+            max_delay = self.max_queue_delay
+        batches = sum(sizes.values())
+        items = sum(size * count for size, count in sizes.items())
+        pct = lambda p: round(percentile(delays, p) * 1000, 3)
+
+        return {
+            "batches": batches,
+            "items": items,
+            "mean_batch_size": round(items / batches, 2) if batches else 0.0,
+            "batch_size_histogram": sizes,
+            "queue_delay_ms": {"p50": pct(50), "p99": pct(99), "max": round(max_delay * 1000, 3)},
+            "batch_seconds": round(self.batch_seconds, 3),
+        }
+
+# ------------------------
+# Synthetic load test
+# ------------------------
+
+SAMPLE_NAMES = ["Zilmil Mander", "Yashica Mukhopadhyay", "Naksh Nair", "Anika Menon",
+                "Rahul Sharma", "Priya Patel", "Arjun Reddy", "Meera Iyer"]
+
+def _synthetic_input(rng):
+    name = rng.choice(SAMPLE_NAMES)
+    typed = name if rng.random() < 0.6 else rng.choice(SAMPLE_NAMES).lower()
+    return {
+        "name_on_doc": name,
+        "name_input": typed,
+        "aadhaar_number": "".join(rng.choice("0123456789") for _ in range(12)),
+        "pan_number": "",
+        "type": "aadhaar",
+    }
+
+def _run_load(scorer, clients, requests_per_client, seed=0):
+    """Each client thread scores its inputs back to back; returns (latencies, wall seconds)."""
+    latencies = []
+    lock = threading.Lock()
+
+    def client(idx):
+        rng = random.Random(seed + idx)
+        local = []
+        for _ in range(requests_per_client):
+            data = _synthetic_input(rng)
+            start = time.perf_counter()
+            scorer.compute_name_similarity(data["name_on_doc"], data["name_input"])
+            scorer.evaluate_structure_with_gnn(data)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client, range(clients)))
+    return sorted(latencies), time.perf_counter() - start
+
+def _summary(label, latencies, wall):
+    p = lambda q: percentile(latencies, q) * 1000
+    print(f"{label:>10}: {len(latencies) / wall:8.1f} req/s | p50 {p(50):7.2f} ms | p99 {p(99):7.2f} ms")
+
+if __name__ == "__main__":
+    PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+
+    parser = argparse.ArgumentParser(description="Compare per-request vs micro-batched model inference.")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=100, help="requests per client")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    from backend.scripts import fraudScoring
+
+    _run_load(fraudScoring, 2, 5)  # warm up
+    _summary("unbatched", *_run_load(fraudScoring, args.clients, args.requests))
+
+    fraudScoring.enable_micro_batching(args.max_batch, args.max_wait_ms)
+    _summary("batched", *_run_load(fraudScoring, args.clients, args.requests))
+    for name, stats in fraudScoring.micro_batching_stats().items():
+        print(f"📊 {name}: {stats}")
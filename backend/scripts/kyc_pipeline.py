@@ -0,0 +1,372 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Add project root to sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from ocr.field_extractor import parse_text
+
+# ------------------------
+# Stage functions
+# ------------------------
+# Each stage takes the job dict and returns it with more fields filled in.
+# OCR and tampering run in process pools, so they must stay top-level
+# picklable functions.
+
+def ocr_stage(job):
+    import pytesseract
+    from PIL import Image
+
+    tesseract_cmd = os.getenv("TESSERACT_CMD")
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    job["text"] = pytesseract.image_to_string(Image.open(job["image_path"]))
+    return job
+
+def extract_stage(job):
+    parsed = parse_text({
+        "file": os.path.basename(job["image_path"]),
+        "document_type": job.get("document_type", ""),
+        "text": job.get("text", ""),
+    })
+    job["extracted"] = parsed
+    job["fraud_input"] = {
+        "is_duplicate": False,
+        "aadhaar_number": parsed["aadhaar_number"],
+        "pan_number": "",
+        "name_on_doc": parsed["name"],
+        "name_input": job.get("name_input", ""),
+        "dob": parsed["dob"],
+        "address": parsed["address"],
+        "type": (job.get("document_type") or "").lower(),
+    }
+    return job
+
+def tamper_stage(job):
+    # backend.scripts.tampering only needs OpenCV, so pool workers never load the models
+    from backend.scripts.tampering import detect_document_tampering
+
+    job["fraud_input"]["has_tampering_signs"] = detect_document_tampering(job["image_path"])
+    return job
+
+def make_duplicate_stage(identity_graph):
+    """Duplicate check against an in-memory IdentityGraph instead of Mongo."""
+    def duplicate_stage(job):
+        aadhaar = job["fraud_input"].get("aadhaar_number")
+        if aadhaar:
+            key = ("aadhaarHash", hashlib.sha256(aadhaar.encode()).hexdigest())
+            job["fraud_input"]["is_duplicate"] = identity_graph.lookup([key])["direct_matches"] > 0
+            identity_graph.add_record(job["id"], [key])
+        return job
+    return duplicate_stage
+
+def score_stage(jobs):
+    """One GNN forward pass and one sentence-encoder call per model for the whole batch."""
+    from backend.scripts import fraudScoring
+
+    inputs = [job["fraud_input"] for job in jobs]
+    structure = fraudScoring.evaluate_structure_with_gnn_batch(inputs)
+    similarity = fraudScoring.compute_name_similarity_batch(
+        [(data.get("name_on_doc", ""), data.get("name_input", "")) for data in inputs]
+    )
+    similar = fraudScoring.find_similar_identities_batch(inputs)
+    for job, structure_ok, name_similarity, matches in zip(jobs, structure, similarity, similar):
+        data = job["fraud_input"]
+        job["fraud_result"] = fraudScoring.calculate_fraud_score(
+            data, data.get("type"), job["image_path"],
+            structure_ok=structure_ok, name_similarity=name_similarity, similar=matches,
+        )
+    return jobs
+
+# ------------------------
+# AML rules (mirror of backend/rules/amlRules.js)
+# ------------------------
+
+BLACKLIST_FILE = os.path.join(PROJECT_ROOT, "backend", "rules", "blacklistedAddresses.json")
+DEFAULT_BLACKLIST = ["PO BOX", "BLACKLISTED ESTATE", "1234 FRAUD LANE"]
+
+def load_blacklist():
+    try:
+        with open(BLACKLIST_FILE, "r", encoding="utf-8") as f:
+            parsed = json.load(f)
+        if isinstance(parsed, list) and parsed:
+            return parsed
+    except (OSError, ValueError):
+        pass
+    return DEFAULT_BLACKLIST
+
+def _normalize(value):
+    cleaned = "".join(str(value or "").split()).upper()
+    return "" if cleaned == "N/A" else cleaned
+
+def apply_aml_rules(extracted, is_duplicate, fraud_result, blacklist=None):
+    blacklist = blacklist if blacklist is not None else load_blacklist()
+    flags, notes = [], []
+
+    if is_duplicate:
+        flags.append("duplicate_aadhaar")
+        notes.append("Aadhaar/PAN matches an existing record (duplicate).")
+
+    address = _normalize(extracted.get("address"))
+    if address and any(p and _normalize(p) in address for p in blacklist):
+        flags.append("blacklisted_address")
+        notes.append("Address matches blacklist patterns.")
+
+    score = fraud_result.get("fraud_score", -1)
+    if str(fraud_result.get("risk_level", "")).lower() == "high" or score >= 71:
+        flags.append("high_fraud_risk")
+        notes.append(f"Risk level is High (score: {score}).")
+
+    action = "clear"
+    if "duplicate_aadhaar" in flags or "blacklisted_address" in flags:
+        action = "auto_flag"
+    elif "high_fraud_risk" in flags:
+        action = "manual_review"
+    return {"amlFlags": flags, "amlAction": action, "notes": notes}
+
+def aml_stage(job):
+    job["aml_result"] = apply_aml_rules(
+        job["extracted"], job["fraud_input"]["is_duplicate"], job["fraud_result"]
+    )
+    return job
+
+# ------------------------
+# Pipeline machinery
+# ------------------------
+
+class Stage:
+    """
+    One pipeline step with its own bounded input queue and worker count.
+
+    fn          : job -> job (or list -> list when batch_size > 1)
+    executor    : run fn there instead of on the event loop
+    batch_size  : collect up to this many jobs per call, waiting at most max_wait seconds
+    """
+
+    def __init__(self, name, fn, concurrency=1, executor=None, queue_size=64,
+                 batch_size=1, max_wait=0.005):
+        self.name = name
+        self.fn = fn
+        self.concurrency = concurrency
+        self.executor = executor
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+
+        self.queue = None
+        self.processed = 0
+        self.errors = 0
+        self.batches = 0
+        self.busy_seconds = 0.0
+
+
+_STOP = object()
+
+class Pipeline:
+    """
+    Stages connected by bounded queues. `submit` blocks when the first queue
+    is full, and a slow stage fills its own queue and stalls the one before
+    it, so bursts are absorbed as backpressure instead of unbounded memory.
+
+    queue_factory(maxsize) defaults to asyncio.Queue; a broker-backed queue
+    only needs the same async get/put and qsize().
+    """
+
+    def __init__(self, stages, queue_factory=asyncio.Queue, output_size=256):
+        self.stages = stages
+        self.queue_factory = queue_factory
+        self.output_size = output_size
+        self.output = None
+        self._tasks = []
+        self._started_at = None
+
+    async def start(self):
+        for stage in self.stages:
+            stage.queue = self.queue_factory(maxsize=stage.queue_size)
+        self.output = self.queue_factory(maxsize=self.output_size)
+        self._started_at = time.monotonic()
+        for i, stage in enumerate(self.stages):
+            downstream = self.stages[i + 1].queue if i + 1 < len(self.stages) else self.output
+            workers = [asyncio.create_task(self._run_stage(stage, downstream))
+                       for _ in range(stage.concurrency)]
+            self._tasks.append(workers)
+
+    async def submit(self, job):
+        await self.stages[0].queue.put(job)
+
+    async def close(self):
+        """Flush every stage in order, then signal the end of output."""
+        for stage, workers in zip(self.stages, self._tasks):
+            for _ in workers:
+                await stage.queue.put(_STOP)
+            await asyncio.gather(*workers)
+            if stage.executor is not None:
+                stage.executor.shutdown(wait=False)
+        await self.output.put(_STOP)
+
+    async def results(self):
+        while True:
+            item = await self.output.get()
+            if item is _STOP:
+                return
+            yield item
+
+    async def _next_batch(self, stage):
+        first = await stage.queue.get()
+        if first is _STOP or stage.batch_size == 1:
+            return first, []
+        batch = [first]
+        deadline = time.monotonic() + stage.max_wait
+        while len(batch) < stage.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(stage.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                return batch, [_STOP]
+            batch.append(item)
+        return batch, []
+
+    async def _call(self, stage, payload):
+        loop = asyncio.get_running_loop()
+        if stage.executor is not None:
+            return await loop.run_in_executor(stage.executor, stage.fn, payload)
+        result = stage.fn(payload)
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result
+
+    async def _run_stage(self, stage, downstream):
+        while True:
+            payload, leftover = await self._next_batch(stage)
+            if payload is _STOP:
+                return
+            jobs = payload if stage.batch_size > 1 else [payload]
+            passthrough = [j for j in jobs if "error" in j]
+            todo = [j for j in jobs if "error" not in j]
+
+            done = []
+            if todo:
+                started = time.monotonic()
+                try:
+                    done = await self._call(stage, todo if stage.batch_size > 1 else todo[0])
+                    if stage.batch_size == 1:
+                        done = [done]
+                except Exception as exc:
+                    stage.errors += len(todo)
+                    for job in todo:
+                        job["error"] = f"{stage.name}: {exc}"
+                    done = todo
+                stage.busy_seconds += time.monotonic() - started
+                stage.processed += len(todo)
+                stage.batches += 1
+
+            for job in done + passthrough:
+                await downstream.put(job)
+            if leftover:
+                return
+
+    def metrics(self):
+        elapsed = max(time.monotonic() - (self._started_at or time.monotonic()), 1e-9)
+        report = {}
+        for stage in self.stages:
+            report[stage.name] = {
+                "queue_depth": stage.queue.qsize() if stage.queue else 0,
+                "processed": stage.processed,
+                "errors": stage.errors,
+                "throughput_per_s": round(stage.processed / elapsed, 2),
+                "avg_batch": round(stage.processed / stage.batches, 2) if stage.batches else 0,
+                "busy_seconds": round(stage.busy_seconds, 3),
+            }
+        report["output_depth"] = self.output.qsize() if self.output else 0
+        return report
+
+# ------------------------
+# Default KYC pipeline
+# ------------------------
+
+def build_kyc_pipeline(ocr_workers=None, score_batch_size=8, identity_graph=None,
+                       queue_size=64, ocr_fn=ocr_stage, score_fn=score_stage,
+                       tamper_workers=None, tamper_fn=tamper_stage):
+    ocr_workers = ocr_workers or os.cpu_count() or 1
+    tamper_workers = tamper_workers or os.cpu_count() or 1
+    stages = [
+        Stage("ocr", ocr_fn, concurrency=ocr_workers,
+              executor=ProcessPoolExecutor(max_workers=ocr_workers), queue_size=queue_size),
+        Stage("extract", extract_stage, concurrency=1, queue_size=queue_size),
+        # OpenCV contour analysis is CPU-bound; keep it off the score stage's single thread
+        Stage("tamper", tamper_fn, concurrency=tamper_workers,
+              executor=ProcessPoolExecutor(max_workers=tamper_workers), queue_size=queue_size),
+    ]
+    if identity_graph is not None:
+        # Graph inserts are not thread-safe, so keep this on the event loop
+        stages.append(Stage("duplicate", make_duplicate_stage(identity_graph), queue_size=queue_size))
+    stages += [
+        Stage("score", score_fn, concurrency=1, executor=ThreadPoolExecutor(max_workers=1),
+              queue_size=queue_size, batch_size=score_batch_size),
+        Stage("aml", aml_stage, concurrency=1, queue_size=queue_size),
+    ]
+    return Pipeline(stages)
+
+async def run_pipeline(pipeline, jobs, on_result, report_every=5.0):
+    """Feed `jobs`, hand every finished job to `on_result`, log metrics periodically."""
+    await pipeline.start()
+
+    async def feed():
+        for job in jobs:
+            await pipeline.submit(job)
+        await pipeline.close()
+
+    async def report():
+        while True:
+            await asyncio.sleep(report_every)
+            print(f"📈 {json.dumps(pipeline.metrics())}", file=sys.stderr)
+
+    feeder = asyncio.create_task(feed())
+    reporter = asyncio.create_task(report())
+    async for job in pipeline.results():
+        on_result(job)
+    await feeder
+    reporter.cancel()
+    return pipeline.metrics()
+
+def _iter_manifest(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            if line.strip():
+                job = json.loads(line)
+                job.setdefault("id", i)
+                yield job
+
+# ------------------------
+# Main Entry Point
+# ------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run KYC documents through the async pipeline.")
+    parser.add_argument("manifest", help="JSONL with image_path, document_type, name_input")
+    parser.add_argument("--ocr-workers", type=int, default=None)
+    parser.add_argument("--tamper-workers", type=int, default=None)
+    parser.add_argument("--score-batch", type=int, default=8)
+    parser.add_argument("--queue-size", type=int, default=64)
+    args = parser.parse_args()
+
+    def emit(job):
+        job.pop("text", None)
+        print(json.dumps(job, ensure_ascii=False), flush=True)
+
+    pipeline = build_kyc_pipeline(args.ocr_workers, args.score_batch, queue_size=args.queue_size,
+                                  tamper_workers=args.tamper_workers)
+    final = asyncio.run(run_pipeline(pipeline, _iter_manifest(args.manifest), emit))
+    print(f"✅ Pipeline finished: {json.dumps(final)}", file=sys.stderr)
@@ -0,0 +1,249 @@
+import os
+import sys
+import json
+import time
+import selectors
+import traceback
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# ------------------------
+# Prefork Worker Pool
+# ------------------------
+#
+# Protocol (newline-delimited JSON):
+#   stdin : {"id": ..., "input": <base64 fraud input or object>, "image_path": "..."}
+#   stdout: {"id": ..., "result": {...}}  or  {"id": ..., "error": "..."}
+#
+# The parent loads and freezes the models once, then forks workers that
+# inherit them copy-on-write. Only the parent reads stdin / writes stdout.
+# Parent and worker exchange (seq, request) / (seq, response) pairs so a
+# worker can have several requests in flight at once.
+
+def _handle(conn, send_lock, handler, seq, request):
+    try:
+        response = {"id": request.get("id"), "result": handler(request)}
+    except Exception as exc:
+        traceback.print_exc(file=sys.stderr)
+        response = {"id": request.get("id"), "error": str(exc)}
+    with send_lock:
+        conn.send((seq, response))
+
+def _worker_main(conn, handler, init_worker, index, concurrency):
+    if init_worker is not None:
+        init_worker(index)
+    send_lock = threading.Lock()
+    # With concurrency > 1 requests run on threads, so handlers that
+    # micro-batch model calls see several callers at once
+    executor = ThreadPoolExecutor(max_workers=concurrency) if concurrency > 1 else None
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        if executor is None:
+            _handle(conn, send_lock, handler, *message)
+        else:
+            executor.submit(_handle, conn, send_lock, handler, *message)
+    if executor is not None:
+        executor.shutdown(wait=True)
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, index, process, conn):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.served = 0
+        self.dispatched = 0
+        self.inflight = {}
+        self.stale = False
+
+
+class PreforkPool:
+    """
+    Dispatches line-delimited requests from stdin to forked workers.
+
+    - each worker holds up to `concurrency` requests at a time
+    - workers are recycled after `max_requests` responses (never when it is 0 or less)
+    - when any file in `watch_paths` changes, `reload_fn` runs in the parent
+      and every worker is replaced once it is idle
+    """
+
+    def __init__(self, handler, workers=None, max_requests=1000, init_worker=None,
+                 reload_fn=None, watch_paths=(), poll_interval=1.0, concurrency=1):
+        self.handler = handler
+        self.num_workers = workers or os.cpu_count() or 1
+        self.concurrency = max(1, concurrency)
+        self.max_requests = max_requests if max_requests and max_requests > 0 else float("inf")
+        self.init_worker = init_worker
+        self.reload_fn = reload_fn
+        self.watch_paths = list(watch_paths)
+        self.poll_interval = poll_interval
+
+        self.ctx = multiprocessing.get_context("fork")
+        self.selector = selectors.DefaultSelector()
+        self.workers = {}
+        self.pending = deque()
+        self.seq = 0
+        self.stats = {"served": 0, "errors": 0, "recycled": 0, "reloads": 0}
+        self._mtimes = self._read_mtimes()
+
+    # ---- worker lifecycle ----
+
+    def _spawn(self, index):
+        parent_conn, child_conn = self.ctx.Pipe()
+        process = self.ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.handler, self.init_worker, index, self.concurrency),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker = _Worker(index, process, parent_conn)
+        self.workers[index] = worker
+        self.selector.register(parent_conn, selectors.EVENT_READ, worker)
+
+    def _retire(self, worker, respawn=True):
+        self.selector.unregister(worker.conn)
+        try:
+            worker.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        worker.conn.close()
+        worker.process.join(timeout=5)
+        if worker.process.is_alive():
+            worker.process.terminate()
+        del self.workers[worker.index]
+        if respawn:
+            self.stats["recycled"] += 1
+            self._spawn(worker.index)
+
+    # ---- model reload ----
+
+    def _read_mtimes(self):
+        return {p: os.path.getmtime(p) for p in self.watch_paths if os.path.exists(p)}
+
+    def _check_reload(self):
+        mtimes = self._read_mtimes()
+        if mtimes == self._mtimes:
+            return
+        self._mtimes = mtimes
+        try:
+            self.reload_fn()
+        except Exception:
+            print("⚠️ Model reload failed, keeping current workers.", file=sys.stderr)
+            traceback.print_exc(file=sys.stderr)
+            return
+        self.stats["reloads"] += 1
+        for worker in list(self.workers.values()):
+            worker.stale = True
+            if not worker.inflight:
+                self._retire(worker)
+
+    # ---- dispatch ----
+
+    def _write(self, response):
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+    def _accepting(self, worker):
+        # Stale or nearly-recycled workers only drain what they already hold
+        return (not worker.stale and worker.dispatched < self.max_requests
+                and len(worker.inflight) < self.concurrency)
+
+    def _dispatch(self):
+        while self.pending:
+            ready = [w for w in self.workers.values() if self._accepting(w)]
+            if not ready:
+                return
+            worker = min(ready, key=lambda w: len(w.inflight))
+            request = self.pending.popleft()
+            self.seq += 1
+            worker.inflight[self.seq] = request
+            worker.dispatched += 1
+            try:
+                worker.conn.send((self.seq, request))
+            except OSError:
+                # Dead worker: its pipe reports EOF next and the request is answered there
+                pass
+
+    def _on_response(self, worker):
+        try:
+            seq, response = worker.conn.recv()
+        except (EOFError, OSError):
+            # Worker died mid-request; answer for everything it held and replace it
+            for request in worker.inflight.values():
+                self.stats["errors"] += 1
+                self._write({"id": request.get("id"), "error": "worker exited"})
+            worker.inflight = {}
+            self._retire(worker)
+            return
+
+        worker.inflight.pop(seq, None)
+        worker.served += 1
+        self.stats["served"] += 1
+        if "error" in response:
+            self.stats["errors"] += 1
+        self._write(response)
+
+        if (worker.stale or worker.served >= self.max_requests) and not worker.inflight:
+            self._retire(worker)
+
+    def _queue_line(self, line):
+        if not line.strip():
+            return
+        try:
+            self.pending.append(json.loads(line))
+        except json.JSONDecodeError as exc:
+            self._write({"id": None, "error": f"invalid request: {exc}"})
+
+    def _on_input(self, stdin_fd, buffer):
+        chunk = os.read(stdin_fd, 65536)
+        if not chunk:
+            # A last request without a trailing newline is still a request
+            self._queue_line(buffer)
+            return b"", False
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            self._queue_line(line)
+        return buffer, True
+
+    def serve(self, stdin=None):
+        stdin = stdin or sys.stdin
+        stdin_fd = stdin.fileno()
+        for index in range(self.num_workers):
+            self._spawn(index)
+        self.selector.register(stdin_fd, selectors.EVENT_READ, None)
+        print(f"🚀 Prefork pool ready with {self.num_workers} workers x {self.concurrency} "
+              f"concurrent requests (pid {os.getpid()})",
+              file=sys.stderr)
+
+        buffer = b""
+        reading = True
+        last_poll = time.monotonic()
+        try:
+            while reading or self.pending or any(w.inflight for w in self.workers.values()):
+                for key, _ in self.selector.select(timeout=self.poll_interval):
+                    if key.data is None:
+                        buffer, reading = self._on_input(stdin_fd, buffer)
+                        if not reading:
+                            self.selector.unregister(stdin_fd)
+                    else:
+                        self._on_response(key.data)
+                self._dispatch()
+
+                if self.reload_fn and time.monotonic() - last_poll >= self.poll_interval:
+                    last_poll = time.monotonic()
+                    self._check_reload()
+        finally:
+            for worker in list(self.workers.values()):
+                self._retire(worker, respawn=False)
+        print(f"📊 Pool stats: {json.dumps(self.stats)}", file=sys.stderr)
+        return self.stats
@@ -0,0 +1,102 @@
+import os
+import cv2
+import threading
+import numpy as np
+
+# ------------------------
+# Tampering Detection
+# ------------------------
+
+# Stage 1: cheap global pre-screen on a 1/4-scale copy, decoded directly at
+# that scale (JPEG DCT scaling) so cleared documents never pay for a
+# full-resolution decode. It only clears documents whose statistics are
+# confidently clean; anything else escalates to the full-resolution contour
+# analysis below. Off unless TAMPERING_CASCADE=1.
+TAMPERING_CASCADE = os.getenv("TAMPERING_CASCADE", "0") == "1"
+PRESCREEN_BLOCK = 8
+PRESCREEN_EDGE_STEP = 60          # gradient that survives blur + Canny(250, 300)
+PRESCREEN_MIN_REGION = 500 // 16  # contour area threshold at 1/4 scale
+PRESCREEN_MAX_REGIONS = int(os.getenv("PRESCREEN_MAX_REGIONS", "10"))
+PRESCREEN_MAX_EDGE_DENSITY = float(os.getenv("PRESCREEN_MAX_EDGE_DENSITY", "0.15"))
+PRESCREEN_MAX_ELA_RATIO = float(os.getenv("PRESCREEN_MAX_ELA_RATIO", "8.0"))
+
+tampering_cascade_stats = {"screened": 0, "escalated": 0}
+_stats_lock = threading.Lock()  # scorer threads (--concurrency) share the counters
+
+def _block_view(values, block):
+    h, w = values.shape
+    h, w = h - h % block, w - w % block
+    return values[:h, :w].reshape(h // block, block, w // block, block)
+
+def prescreen_tampering(small):
+    """
+    Global statistics of a downscaled grayscale image:
+    - edge_density: share of pixels with a strong gradient
+    - edge_regions: strong-edge blobs big enough to become a large contour at full size
+    - ela_ratio: worst block JPEG error level vs. the median block
+    Returns (suspicious, stats).
+    """
+    blurred = cv2.GaussianBlur(small, (3, 3), 0).astype(np.float32)
+    gx = np.abs(np.diff(blurred, axis=1))[:-1, :]
+    gy = np.abs(np.diff(blurred, axis=0))[:, :-1]
+    strong = (gx + gy) > PRESCREEN_EDGE_STEP
+    edge_density = float(strong.mean())
+
+    _, _, regions, _ = cv2.connectedComponentsWithStats(strong.astype(np.uint8), connectivity=8)
+    bbox_area = regions[1:, cv2.CC_STAT_WIDTH] * regions[1:, cv2.CC_STAT_HEIGHT]
+    edge_regions = int((bbox_area >= PRESCREEN_MIN_REGION).sum())
+
+    ela_ratio = 0.0
+    ok, encoded = cv2.imencode(".jpg", small, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    if ok:
+        error = np.abs(small.astype(np.float32) - cv2.imdecode(encoded, cv2.IMREAD_GRAYSCALE))
+        block_err = _block_view(error, PRESCREEN_BLOCK).mean(axis=(1, 3))
+        if block_err.size:
+            ela_ratio = float((block_err.max() + 1.0) / (np.median(block_err) + 1.0))
+
+    stats = {"edge_density": edge_density, "edge_regions": edge_regions, "ela_ratio": ela_ratio}
+    suspicious = (
+        edge_regions > PRESCREEN_MAX_REGIONS
+        or edge_density > PRESCREEN_MAX_EDGE_DENSITY
+        or ela_ratio > PRESCREEN_MAX_ELA_RATIO
+    )
+    return suspicious, stats
+
+def detect_contour_tampering(image):
+    """Stage 2: full-resolution Canny + contour-area analysis."""
+    image = cv2.GaussianBlur(image, (5, 5), 0)
+
+    # Edge detection with higher threshold to ignore text noise
+    edges = cv2.Canny(image, 250, 300)
+
+    # Use contour area instead of just count
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    large_contours = [cnt for cnt in contours if cv2.contourArea(cnt) > 500]
+
+    return len(large_contours) > 10  # Only flag if there are many large, irregular patches
+
+def detect_document_tampering(image_path, cascade=None):
+    if cascade is None:
+        cascade = TAMPERING_CASCADE
+    try:
+        if cascade:
+            small = cv2.imread(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+            if small is None:
+                return False
+            suspicious, _ = prescreen_tampering(small)
+            with _stats_lock:
+                tampering_cascade_stats["screened"] += 1
+                tampering_cascade_stats["escalated"] += suspicious
+            if not suspicious:
+                return False
+        image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            return False
+        return detect_contour_tampering(image)
+    except Exception:
+        return False
+
+def tampering_escalation_rate():
+    with _stats_lock:
+        screened, escalated = tampering_cascade_stats["screened"], tampering_cascade_stats["escalated"]
+    return escalated / screened if screened else 0.0
@@ -0,0 +1,421 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import base64
+import random
+import shutil
+import string
+import hmac
+import hashlib
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCORER_PATH = os.path.join(SCRIPT_DIR, "fraudScoring.py")
+
+# Add project root to sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from backend.scripts.inference_batcher import percentile
+
+# ------------------------
+# PII Redaction / Substitution
+# ------------------------
+
+# Allow-list: only these fraud-input keys are stored as-is. Every other
+# key is treated as PII, so fields added to the input later are masked by
+# default instead of leaking into recordings.
+SAFE_FIELDS = ("is_duplicate", "name_similarity_score", "type", "has_tampering_signs")
+
+def _token_rng(token, salt):
+    # Keyed with the secret salt so fakes cannot be reversed by enumerating inputs
+    seed = hmac.new(salt.encode(), token.lower().encode(), hashlib.sha256).digest()
+    return random.Random(seed)
+
+def _fake_word(word, salt):
+    """Same word -> same fake word, keeping length, case and digits/letters layout."""
+    rng = _token_rng(word, salt)
+    out = []
+    for ch in word:
+        if ch.isdigit():
+            out.append(rng.choice(string.digits))
+        elif ch.isalpha():
+            c = rng.choice(string.ascii_lowercase)
+            out.append(c.upper() if ch.isupper() else c)
+        else:
+            out.append(ch)
+    return "".join(out)
+
+def _fake_aadhaar(value, salt):
+    """12 digits that still pass (or still fail) the Verhoeff check like the original."""
+    from backend.scripts.verhoeff import verhoeff_check, verhoeff_digit
+
+    digits = "".join(ch for ch in value if ch.isdigit())
+    if len(digits) != 12:
+        return _fake_word(value, salt)
+    body = _fake_word(digits[:11], salt)
+    check = verhoeff_digit(body)
+    if not verhoeff_check(digits):
+        check = (check + 1) % 10
+    return body + str(check)
+
+def _fake_pan(value, salt):
+    return _fake_word(value, salt)
+
+def _fake_date(value, salt):
+    """A valid dd-mm-yyyy style date in the same format; unrelated to the original."""
+    match = re.fullmatch(r"(\d{1,2})([-/.])(\d{1,2})([-/.])(\d{2,4})", value.strip())
+    if not match:
+        return _fake_word(value, salt)
+    rng = _token_rng(value, salt)
+    day, month = rng.randint(1, 28), rng.randint(1, 12)
+    year = rng.randint(1950, 2005)
+    year = str(year)[-len(match.group(5)):]
+    return f"{day:02d}{match.group(2)}{month:02d}{match.group(4)}{year}"
+
+def _redact(value):
+    return "".join("0" if c.isdigit() else "X" if c.isalpha() else c for c in value)
+
+def anonymize_input(data, salt, mode="synthetic"):
+    """
+    mode="synthetic": substitute every PII token with a stable fake of the
+      same shape (keyed by `salt`), so exact matches, duplicates and Aadhaar
+      checksum outcomes are preserved. Near-match name similarity is not.
+    mode="redact": replace PII with X/0 of the same length.
+
+    Keys outside SAFE_FIELDS are PII; non-string values there are dropped.
+    """
+    clean = {}
+    for field, value in data.items():
+        if field in SAFE_FIELDS:
+            clean[field] = value
+        elif not isinstance(value, str):
+            continue
+        elif not value or mode == "redact":
+            clean[field] = _redact(value)
+        elif field == "aadhaar_number":
+            clean[field] = _fake_aadhaar(value, salt)
+        elif field == "pan_number":
+            clean[field] = _fake_pan(value, salt)
+        elif field == "dob":
+            clean[field] = _fake_date(value, salt)
+        else:
+            clean[field] = " ".join(_fake_word(w, salt) for w in value.split(" "))
+    return clean
+
+def placeholder_image(image_path, dest_path):
+    """
+    Write a blank image with the source's size, channels and encoding, so
+    replayed requests exercise the same decode/resize cost without any of
+    the document content. Returns False if the source cannot be decoded.
+    """
+    import cv2
+    import numpy as np
+
+    image = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
+    if image is None:
+        return False
+    ok, encoded = cv2.imencode(os.path.splitext(dest_path)[1] or ".png", np.full_like(image, 128))
+    if not ok:
+        return False
+    with open(dest_path, "wb") as f:
+        f.write(encoded.tobytes())
+    return True
+
+# ------------------------
+# Recorder
+# ------------------------
+
+def record_request(record_dir, input_data, image_path, mode=None, salt=None, raw_images=None):
+    """
+    Save one scorer input (anonymized fraud-input JSON as base64 + image).
+    Called from fraudScoring.score_request when FRAUD_RECORD_DIR is set.
+
+    FRAUD_RECORD_SALT must hold a secret; recording is refused without one.
+    Images are stored as same-size blank placeholders unless raw copies are
+    explicitly enabled with FRAUD_RECORD_RAW_IMAGES=1 (they contain the
+    photo, Aadhaar number, name, DOB and address).
+    """
+    mode = mode or os.getenv("FRAUD_RECORD_MODE", "synthetic")
+    salt = salt or os.getenv("FRAUD_RECORD_SALT")
+    if not salt:
+        raise ValueError("FRAUD_RECORD_SALT is not set; refusing to record traffic")
+    if raw_images is None:
+        raw_images = os.getenv("FRAUD_RECORD_RAW_IMAGES") == "1"
+    os.makedirs(record_dir, exist_ok=True)
+
+    rec_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+    image_copy = None
+    if image_path and os.path.exists(image_path):
+        image_copy = f"{rec_id}{os.path.splitext(image_path)[1] or '.png'}"
+        dest = os.path.join(record_dir, image_copy)
+        if raw_images:
+            shutil.copyfile(image_path, dest)
+        elif not placeholder_image(image_path, dest):
+            image_copy = None
+
+    clean = anonymize_input(input_data, salt, mode=mode)
+    entry = {
+        "id": rec_id,
+        "recorded_at": time.time(),
+        "input": base64.b64encode(json.dumps(clean).encode("utf-8")).decode("ascii"),
+        "image": image_copy,
+        "pii_mode": mode,
+        "image_mode": "raw" if raw_images else "placeholder",
+    }
+    with open(os.path.join(record_dir, "recordings.jsonl"), "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+    return rec_id
+
+def load_recordings(record_dir):
+    entries = []
+    with open(os.path.join(record_dir, "recordings.jsonl"), "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entry["image_path"] = os.path.join(record_dir, entry["image"]) if entry.get("image") else ""
+                entries.append(entry)
+    return entries
+
+# ------------------------
+# Replay targets
+# ------------------------
+
+class CliTarget:
+    """One `python fraudScoring.py <base64> <image>` process per request."""
+
+    def __init__(self, python=sys.executable):
+        self.python = python
+
+    def call(self, entry):
+        proc = subprocess.run(
+            [self.python, SCORER_PATH, entry["input"], entry["image_path"]],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            return False
+        json.loads(proc.stdout)
+        return True
+
+    def close(self):
+        pass
+
+
+class ServeTarget:
+    """
+    A single long-running `fraudScoring.py --serve` process. A call that
+    gets no answer within `timeout` seconds, or is made after the process
+    has gone away, fails instead of blocking.
+    """
+
+    def __init__(self, python=sys.executable, serve_args=(), timeout=60.0):
+        env = dict(os.environ)
+        env.pop("FRAUD_RECORD_DIR", None)  # never re-record replayed traffic
+        self.proc = subprocess.Popen(
+            [python, SCORER_PATH, "--serve", *serve_args],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1, env=env,
+        )
+        self.timeout = timeout
+        self.lock = threading.Lock()          # serializes writes to stdin
+        self.waiting_lock = threading.Lock()  # guards waiting / dead
+        self.waiting = {}
+        self.dead = False
+        self.reader = threading.Thread(target=self._read, daemon=True)
+        self.reader.start()
+
+    def _read(self):
+        try:
+            for line in self.proc.stdout:
+                try:
+                    response = json.loads(line)
+                except ValueError:
+                    response = None
+                if not isinstance(response, dict):
+                    print(f"⚠️ Ignoring non-JSON scorer output: {line.strip()[:200]}", file=sys.stderr)
+                    continue
+                with self.waiting_lock:
+                    slot = self.waiting.pop(response.get("id"), None)
+                if slot is not None:
+                    slot[1] = response
+                    slot[0].set()
+        finally:
+            # Process exited or the reader failed: fail everything still waiting
+            with self.waiting_lock:
+                self.dead = True
+                slots, self.waiting = list(self.waiting.values()), {}
+            for slot in slots:
+                slot[0].set()
+
+    def call(self, entry):
+        req_id = uuid.uuid4().hex
+        slot = [threading.Event(), None]
+        with self.waiting_lock:
+            if self.dead:
+                return False
+            self.waiting[req_id] = slot
+        line = json.dumps({"id": req_id, "input": entry["input"], "image_path": entry["image_path"]})
+        try:
+            with self.lock:
+                self.proc.stdin.write(line + "\n")
+                self.proc.stdin.flush()
+        except (OSError, ValueError):
+            # Broken pipe, or stdin already closed
+            with self.waiting_lock:
+                self.waiting.pop(req_id, None)
+            return False
+        if not slot[0].wait(self.timeout):
+            with self.waiting_lock:
+                self.waiting.pop(req_id, None)
+            return False
+        return slot[1] is not None and "result" in slot[1]
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        self.proc.wait()
+
+# ------------------------
+# Load generation
+# ------------------------
+
+class LatencyLog:
+    def __init__(self):
+        self.samples = []   # (start offset s, latency s, ok)
+        self.lock = threading.Lock()
+
+    def add(self, start, latency, ok):
+        with self.lock:
+            self.samples.append((start, latency, ok))
+
+def _timed_call(target, entry, log, t0, scheduled=None):
+    start = time.perf_counter()
+    try:
+        ok = target.call(entry)
+    except Exception:
+        ok = False
+    end = time.perf_counter()
+    # Open loop measures from the scheduled send time, so queueing inside
+    # the load generator is not hidden (avoids coordinated omission)
+    began = scheduled if scheduled is not None else start
+    log.add(began - t0, end - began, ok)
+
+def run_closed_loop(target, entries, concurrency, duration):
+    log = LatencyLog()
+    t0 = time.perf_counter()
+    deadline = t0 + duration
+    counter = iter(range(10 ** 12))
+    counter_lock = threading.Lock()
+
+    def worker():
+        while time.perf_counter() < deadline:
+            with counter_lock:
+                i = next(counter)
+            _timed_call(target, entries[i % len(entries)], log, t0)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return log
+
+def run_open_loop(target, entries, qps, duration, max_inflight=256, poisson=False):
+    log = LatencyLog()
+    t0 = time.perf_counter()
+    rng = random.Random(0)
+    with ThreadPoolExecutor(max_workers=max_inflight) as pool:
+        next_send = t0
+        i = 0
+        while next_send < t0 + duration:
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(_timed_call, target, entries[i % len(entries)], log, t0, next_send)
+            i += 1
+            next_send += rng.expovariate(qps) if poisson else 1.0 / qps
+    return log
+
+# ------------------------
+# Reporting
+# ------------------------
+
+def summarize(samples):
+    latencies = sorted(s[1] for s in samples)
+    errors = sum(1 for s in samples if not s[2])
+    span = (max(s[0] + s[1] for s in samples) - min(s[0] for s in samples)) if samples else 0
+    return {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / span, 2) if span > 0 else 0.0,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+    }
+
+def report(log, window):
+    windows = {}
+    for sample in log.samples:
+        windows.setdefault(int(sample[0] // window), []).append(sample)
+    print(f"{'window':>10} {'reqs':>6} {'rps':>8} {'err%':>6} {'p50':>8} {'p90':>8} {'p99':>8}")
+    for idx in sorted(windows):
+        s = summarize(windows[idx])
+        rps = s["requests"] / window
+        print(f"{idx * window:>9.1f}s {s['requests']:>6} {rps:>8.2f} {s['error_rate'] * 100:>6.2f} "
+              f"{s['p50_ms']:>8.1f} {s['p90_ms']:>8.1f} {s['p99_ms']:>8.1f}")
+    total = summarize(log.samples)
+    print(f"📊 Total: {json.dumps(total)}")
+    return total
+
+# ------------------------
+# Main Entry Point
+# ------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded fraud-scoring traffic.")
+    parser.add_argument("record_dir")
+    parser.add_argument("--target", choices=["cli", "serve"], default="serve")
+    parser.add_argument("--workers", type=int, default=None, help="workers for --target serve")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="seconds before an unanswered --target serve request counts as an error")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--qps", type=float, help="open loop at this request rate")
+    mode.add_argument("--concurrency", type=int, help="closed loop with this many clients")
+    parser.add_argument("--poisson", action="store_true", help="exponential inter-arrival times")
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--window", type=float, default=10.0, help="report bucket size in seconds")
+    parser.add_argument("--output", help="write raw samples as JSON")
+    args = parser.parse_args()
+
+    entries = load_recordings(args.record_dir)
+    if not entries:
+        print("⚠️ No recordings found.")
+        sys.exit(1)
+
+    if args.target == "cli":
+        target = CliTarget()
+    else:
+        target = ServeTarget(serve_args=["--workers", str(args.workers)] if args.workers else [],
+                             timeout=args.timeout)
+
+    try:
+        if args.qps:
+            log = run_open_loop(target, entries, args.qps, args.duration, poisson=args.poisson)
+        else:
+            log = run_closed_loop(target, entries, args.concurrency, args.duration)
+    finally:
+        target.close()
+
+    report(log, args.window)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(log.samples, f)
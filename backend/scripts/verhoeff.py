@@ -0,0 +1,44 @@
+# ------------------------
+# Verhoeff Checksum Tables
+# ------------------------
+
+mul_table = [
+    [0,1,2,3,4,5,6,7,8,9],
+    [1,2,3,4,0,6,7,8,9,5],
+    [2,3,4,0,1,7,8,9,5,6],
+    [3,4,0,1,2,8,9,5,6,7],
+    [4,0,1,2,3,9,5,6,7,8],
+    [5,9,8,7,6,0,4,3,2,1],
+    [6,5,9,8,7,1,0,4,3,2],
+    [7,6,5,9,8,2,1,0,4,3],
+    [8,7,6,5,9,3,2,1,0,4],
+    [9,8,7,6,5,4,3,2,1,0]
+]
+
+perm_table = [
+    [0,1,2,3,4,5,6,7,8,9],
+    [1,5,7,6,2,8,3,0,9,4],
+    [5,8,0,3,7,9,6,1,4,2],
+    [8,9,1,6,0,4,3,5,2,7],
+    [9,4,5,3,1,2,6,8,7,0],
+    [4,2,8,6,5,7,3,9,0,1],
+    [2,7,9,3,8,0,6,4,1,5],
+    [7,0,4,6,9,1,3,2,5,8]
+]
+
+def verhoeff_check(num):
+    c = 0
+    num = str(num)[::-1]
+    for i, item in enumerate(num):
+        c = mul_table[c][perm_table[i % 8][int(item)]]
+    return c == 0
+
+inv_table = [0,4,3,2,1,5,6,7,8,9]
+
+def verhoeff_digit(num):
+    """Check digit to append to `num` so that the result passes verhoeff_check."""
+    c = 0
+    num = str(num)[::-1]
+    for i, item in enumerate(num):
+        c = mul_table[c][perm_table[(i + 1) % 8][int(item)]]
+    return inv_table[c]
@@ -1,9 +1,17 @@
 import re
-import json
 import os
+import sys
+
+# Add project root to sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from utils.records import OcrRecord, RecordSink, iter_records
 
 INPUT_FILE = "data/ocr_raw.json"
-OUTPUT_FILE = "data/ocr_results.json"
+OUTPUT_FILE = "data/ocr_results.jsonl"
+OUTPUT_CSV = "data/ocr_results.csv"
 
 def parse_text(record):
     """
@@ -68,16 +76,12 @@ def main():
         print(f" Input file not found: {INPUT_FILE}")
         return
 
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        raw_data = json.load(f)
-
-    structured_data = [parse_text(record) for record in raw_data]
-
-    os.makedirs("data", exist_ok=True)
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(structured_data, f, indent=4, ensure_ascii=False)
+    with RecordSink(OUTPUT_FILE, OUTPUT_CSV, csv_fields=OcrRecord.FIELDS,
+                    csv_text_fields=("aadhaar_number",)) as sink:
+        for record in iter_records(INPUT_FILE):
+            sink.write(parse_text(record))
 
-    print(f"Field extraction complete. Results saved to {OUTPUT_FILE}")
+    print(f"Field extraction complete. {sink.count} results saved to {OUTPUT_FILE} and {OUTPUT_CSV}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,147 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import subprocess
+from collections import defaultdict
+
+# Add project root to sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from ocr.field_extractor import parse_text
+from utils.records import OcrRecord, PersonRecord, RecordSink, iter_records
+from utils.cleaning_utils import merge_records
+
+# ------------------------
+# Synthetic OCR input
+# ------------------------
+
+SAMPLE_RAW = os.path.join(PROJECT_ROOT, "data", "ocr_raw.json")
+
+def write_raw_input(path, rows, seed=0):
+    """
+    Scale data/ocr_raw.json up to `rows` documents, giving every copy a new
+    name, house number and Aadhaar number so merging does not collapse them.
+    """
+    rng = random.Random(seed)
+    with open(SAMPLE_RAW, "r", encoding="utf-8") as f:
+        templates = json.load(f)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for i in range(rows):
+            base = templates[i % len(templates)]
+            person = i // 2  # an Aadhaar card and a bill per person
+            text = base["text"].replace("Name: ", f"Name: P{person} ", 1)
+            text = text.replace("House No. ", f"House No. {person}-", 1)
+            aadhaar = f"{rng.randint(1000, 9999)} {rng.randint(1000, 9999)} {rng.randint(1000, 9999)}"
+            text = text.replace("Your Aadhaar No.:\n\n", f"Your Aadhaar No.:\n\n{aadhaar}\n", 1)
+            record = {"file": f"person_{person}_{i % 2}.jpg", "document_type": base["document_type"], "text": text}
+            f.write(("    " if i == 0 else ",\n    ") + json.dumps(record, ensure_ascii=False))
+        f.write("\n]\n")
+
+# ------------------------
+# The two paths under test
+# ------------------------
+
+def run_legacy(raw_path, out_dir):
+    """Previous behaviour: full lists of dicts, indented JSON, second pass for CSV."""
+    import csv
+
+    with open(raw_path, "r", encoding="utf-8") as f:
+        raw_data = json.load(f)
+    structured_data = [parse_text(record) for record in raw_data]
+    ocr_path = os.path.join(out_dir, "ocr_results.json")
+    with open(ocr_path, "w", encoding="utf-8") as f:
+        json.dump(structured_data, f, indent=4, ensure_ascii=False)
+
+    with open(ocr_path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    merged = defaultdict(lambda: {"name": "", "address": "", "aadhaar_number": ""})
+    for rec in records:
+        person = merged[(rec["name"], rec["address"])]
+        person["name"] = rec["name"]
+        person["address"] = rec["address"]
+        if rec.get("aadhaar_number"):
+            person["aadhaar_number"] = rec["aadhaar_number"]
+    cleaned = [rec for rec in merged.values() if rec.get("aadhaar_number", "").strip() != ""]
+
+    with open(os.path.join(out_dir, "final_dataset.json"), "w", encoding="utf-8") as f:
+        json.dump(cleaned, f, indent=4, ensure_ascii=False)
+    with open(os.path.join(out_dir, "final_dataset.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["name", "address", "aadhaar_number"])
+        writer.writeheader()
+        for row in cleaned:
+            row_copy = row.copy()
+            if row_copy.get("aadhaar_number"):
+                row_copy["aadhaar_number"] = "\t" + str(row_copy["aadhaar_number"])
+            writer.writerow(row_copy)
+    return len(cleaned)
+
+def run_streaming(raw_path, out_dir):
+    """Current behaviour: streamed input, slotted records, one-pass JSONL + CSV sink."""
+    ocr_path = os.path.join(out_dir, "ocr_results.jsonl")
+    with RecordSink(ocr_path, os.path.join(out_dir, "ocr_results.csv"), csv_fields=OcrRecord.FIELDS,
+                    csv_text_fields=("aadhaar_number",)) as sink:
+        for record in iter_records(raw_path):
+            sink.write(parse_text(record))
+
+    merged = merge_records(iter_records(ocr_path))
+    with RecordSink(os.path.join(out_dir, "final_dataset.jsonl"), os.path.join(out_dir, "final_dataset.csv"),
+                    csv_fields=PersonRecord.FIELDS, csv_text_fields=("aadhaar_number",)) as sink:
+        sink.write_all(rec for rec in merged if rec.aadhaar_number.strip() != "")
+    return sink.count
+
+PATHS = {"legacy": run_legacy, "streaming": run_streaming}
+
+def _measure(path_name, raw_path, out_dir):
+    """Runs inside a fresh interpreter so ru_maxrss covers only this path."""
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    rows = PATHS[path_name](raw_path, out_dir)
+    print(json.dumps({
+        "path": path_name,
+        "rows_out": rows,
+        "seconds": round(time.perf_counter() - start, 2),
+        "baseline_rss_mb": round(baseline / 1024, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }))
+
+# ------------------------
+# Main Entry Point
+# ------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak RSS of the legacy vs streaming data-prep path.")
+    parser.add_argument("--rows", type=int, default=200000, help="OCR documents to generate")
+    parser.add_argument("--workdir", default="data/benchmark")
+    parser.add_argument("--measure", choices=sorted(PATHS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    raw_path = os.path.join(args.workdir, "ocr_raw.json")
+    if args.measure:
+        out_dir = os.path.join(args.workdir, args.measure)
+        os.makedirs(out_dir, exist_ok=True)
+        _measure(args.measure, raw_path, out_dir)
+        return
+
+    os.makedirs(args.workdir, exist_ok=True)
+    write_raw_input(raw_path, args.rows)
+    print(f"📄 {args.rows} OCR documents ({os.path.getsize(raw_path) / 2**20:.1f} MB) in {raw_path}")
+
+    for path_name in ("legacy", "streaming"):
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--workdir", args.workdir, "--measure", path_name],
+            capture_output=True, text=True, check=True,
+        )
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"📊 {result['path']:>9}: peak RSS {result['peak_rss_mb']:8.1f} MB "
+              f"(+{result['peak_rss_mb'] - result['baseline_rss_mb']:.1f} MB over startup) "
+              f"| {result['seconds']:.2f}s | {result['rows_out']} rows")
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,56 @@
 import json
-import csv
 import os
-from collections import defaultdict
+import sys
+
+# Add project root to sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from utils.records import PersonRecord, RecordSink, SlotRecord, iter_records
+from utils.consistency_join import ConsistencyJoin, is_identity_doc, is_address_proof
 
 def load_ocr_results(file_path):
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def merge_records(records):
-    merged = defaultdict(lambda: {
-        "name": "",
-        "address": "",
-        "aadhaar_number": ""
-    })
-    
-    for rec in records:
-        key = (rec["name"], rec["address"]) 
-        person = merged[key]
-        person["name"] = rec["name"]
-        person["address"] = rec["address"]
-
-        if rec.get("aadhaar_number"):
-            person["aadhaar_number"] = rec["aadhaar_number"]
+    """Stream OCR results from a JSON array or JSONL file."""
+    return iter_records(file_path)
+
+def merge_records(records, as_of=None):
+    """
+    One PersonRecord per Aadhaar card (deduplicated on name + address; the
+    last non-empty Aadhaar number wins). Utility bills are paired with cards
+    through ConsistencyJoin rather than exact (name, address) equality: the
+    best-scoring bill supplies bill_date, and address_verified is True only
+    when that pair passed every consistency check.
+    """
+    join = ConsistencyJoin(as_of=as_of)
+    merged = {}
+    person_of = {}    # identity document ref -> merged key
+    bill_dates = {}   # bill document ref -> bill_date
+    best = {}         # merged key -> consistency of the bill it holds
+
+    def apply(pairs):
+        for pair in pairs:
+            if pair.get("joined_on") is None:
+                continue
+            key = person_of[pair["identity_doc"]]
+            if pair["consistency"] > best.get(key, -1.0):
+                best[key] = pair["consistency"]
+                merged[key].bill_date = bill_dates[pair["address_doc"]]
+                merged[key].address_verified = not pair["flagged"]
+
+    for ref, rec in enumerate(records):
+        if is_identity_doc(rec):
+            key = (rec["name"], rec["address"])
+            person = merged.get(key)
+            if person is None:
+                person = merged[key] = PersonRecord(name=rec["name"], address=rec["address"])
+            if rec.get("aadhaar_number"):
+                person.aadhaar_number = rec["aadhaar_number"]
+            person_of[ref] = key
+        elif is_address_proof(rec):
+            bill_dates[ref] = rec.get("bill_date", "")
+        apply(join.add(rec, ref=ref))
+    apply(join.finish())
 
     return list(merged.values())
 
@@ -31,25 +60,20 @@ def ensure_dir(path):
 
 def save_json(dataset, output_file):
     ensure_dir(output_file)
+    rows = [rec.to_dict() if isinstance(rec, SlotRecord) else rec for rec in dataset]
     with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(dataset, f, indent=4, ensure_ascii=False)
+        json.dump(rows, f, indent=4, ensure_ascii=False)
 
 def save_csv(dataset, output_file):
-    ensure_dir(output_file)
-    fieldnames = ["name", "address", "aadhaar_number"]
-    with open(output_file, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in dataset:
-            row_copy = row.copy()
-  
-            if row_copy.get("aadhaar_number"):
-                row_copy["aadhaar_number"] = "\t" + str(row_copy["aadhaar_number"])
-            writer.writerow(row_copy)
+    with RecordSink(csv_path=output_file, csv_fields=PersonRecord.FIELDS,
+                    csv_text_fields=("aadhaar_number",)) as sink:
+        sink.write_all(dataset)
 
 def main():
-    input_file = "data/ocr_results.json"
-    output_json = "data/processed/final_dataset.json"
+    input_file = "data/ocr_results.jsonl"
+    if not os.path.exists(input_file):
+        input_file = "data/ocr_results.json"  # written by older field_extractor runs
+    output_jsonl = "data/processed/final_dataset.jsonl"
     output_csv = "data/processed/final_dataset.csv"
 
     if not os.path.exists(input_file):
@@ -59,11 +83,12 @@ def main():
     records = load_ocr_results(input_file)
     merged_data = merge_records(records)
 
-    cleaned_data = [rec for rec in merged_data if rec.get("aadhaar_number", "").strip() != ""]
+    cleaned_data = (rec for rec in merged_data if rec.aadhaar_number.strip() != "")
 
-    save_json(cleaned_data, output_json)
-    save_csv(cleaned_data, output_csv)
-    print(f" Final dataset saved in:\n- {output_json}\n- {output_csv}")
+    with RecordSink(output_jsonl, output_csv, csv_fields=PersonRecord.FIELDS,
+                    csv_text_fields=("aadhaar_number",)) as sink:
+        sink.write_all(cleaned_data)
+    print(f" Final dataset saved in:\n- {output_jsonl}\n- {output_csv}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,323 @@
+import os
+import re
+import sys
+import json
+import zlib
+import argparse
+from collections import deque
+from datetime import date, datetime
+import numpy as np
+
+# Add project root to sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from utils.records import iter_records
+
+# ------------------------
+# Normalization
+# ------------------------
+
+SIG_WORDS = 4  # 4 x 64-bit words = 256-bit token signatures
+ADDRESS_STOPWORDS = {"address", "house", "no", "road", "street", "st", "rd", "near", "opp"}
+
+def name_tokens(name):
+    return [t for t in re.sub(r"[^a-z\s]", " ", (name or "").lower()).split() if len(t) > 1]
+
+def address_tokens(address):
+    tokens = re.sub(r"[^a-z0-9\s]", " ", (address or "").lower()).split()
+    return [t for t in tokens if t not in ADDRESS_STOPWORDS]
+
+def extract_pincode(address):
+    match = re.search(r"\b(\d{6})\b", address or "")
+    return match.group(1) if match else ""
+
+def extract_house_number(address):
+    match = re.search(r"(?i)\b(?:house|h)\.?\s*no\.?\s*[:\-]?\s*(\w+)", address or "")
+    return match.group(1).upper() if match else ""
+
+def extract_applicant(record):
+    """Explicit applicant/user id, or the person_<n> prefix of generated sample files."""
+    for key in ("applicant_id", "userId", "user_id"):
+        if record.get(key):
+            return str(record[key])
+    match = re.match(r"(person_\d+)_", record.get("file", ""))
+    return match.group(1) if match else ""
+
+def parse_day(value):
+    """dd-mm-yyyy / dd/mm/yyyy -> proleptic ordinal, 0 when missing or unreadable."""
+    match = re.search(r"(\d{1,2})[-/.](\d{1,2})[-/.](\d{2,4})", value or "")
+    if not match:
+        return 0
+    day, month, year = (int(g) for g in match.groups())
+    if year < 100:
+        year += 2000
+    try:
+        return date(year, month, day).toordinal()
+    except ValueError:
+        return 0
+
+def signature(features):
+    """Hash a token / trigram set into a fixed-width bitset for vectorized Jaccard."""
+    bits = 0
+    for feature in features:
+        bits |= 1 << (zlib.crc32(feature.encode("utf-8")) % (64 * SIG_WORDS))
+    return np.frombuffer(bits.to_bytes(8 * SIG_WORDS, "little"), dtype=np.uint64)
+
+def trigrams(tokens):
+    grams = set()
+    for token in tokens:
+        padded = f" {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+# ------------------------
+# Compact document rows
+# ------------------------
+
+def is_identity_doc(record):
+    return "aadhaar" in (record.get("document_type") or "").lower()
+
+def is_address_proof(record):
+    doc_type = (record.get("document_type") or "").lower()
+    return "utility" in doc_type or "bill" in doc_type
+
+class DocumentRow:
+    __slots__ = ("ref", "name_tokens", "name_sig", "addr_sig", "pincode", "house_no", "bill_day",
+                 "applicant", "matched")
+
+    def __init__(self, record, ref):
+        tokens = name_tokens(record.get("name"))
+        self.ref = ref
+        self.name_tokens = tokens
+        self.name_sig = signature(trigrams(tokens))
+        self.addr_sig = signature(set(address_tokens(record.get("address"))))
+        self.pincode = extract_pincode(record.get("address"))
+        self.house_no = extract_house_number(record.get("address"))
+        self.bill_day = parse_day(record.get("bill_date"))
+        self.applicant = extract_applicant(record)
+        self.matched = False
+
+    def join_keys(self):
+        """
+        Keys this document can be paired on. A known applicant id is
+        authoritative; otherwise pair on house number + pincode and on name
+        tokens + pincode. Without a pincode there is no safe fuzzy key: a bare
+        name would pair every namesake in the dataset.
+        """
+        if self.applicant:
+            return [("applicant", self.applicant)]
+        keys = []
+        if self.pincode and self.house_no:
+            keys.append(("address", self.pincode, self.house_no))
+        if self.pincode and self.name_tokens:
+            keys.append(("name", self.pincode, " ".join(sorted(self.name_tokens))))
+        return keys
+
+# ------------------------
+# Vectorized consistency scoring
+# ------------------------
+
+def _popcount(words):
+    return np.unpackbits(np.ascontiguousarray(words).view(np.uint8), axis=-1).sum(axis=-1)
+
+def jaccard(a, b):
+    inter = _popcount(a & b)
+    union = _popcount(a | b)
+    return np.where(union > 0, inter / np.maximum(union, 1), 0.0)
+
+def score_pairs(ids, bills, as_of_day, max_bill_age_days=90,
+                min_address_overlap=0.5, min_name_similarity=0.6):
+    """
+    ids / bills: equal-length lists of DocumentRow, one joined pair per index.
+    Returns a dict of NumPy columns.
+    """
+    id_addr = np.stack([r.addr_sig for r in ids])
+    bill_addr = np.stack([r.addr_sig for r in bills])
+    id_name = np.stack([r.name_sig for r in ids])
+    bill_name = np.stack([r.name_sig for r in bills])
+    bill_day = np.array([r.bill_day for r in bills], dtype=np.int64)
+    same_pin = np.array([a.pincode == b.pincode and a.pincode != "" for a, b in zip(ids, bills)])
+
+    address_overlap = jaccard(id_addr, bill_addr)
+    name_similarity = jaccard(id_name, bill_name)
+    bill_age = np.where(bill_day > 0, as_of_day - bill_day, -1)
+    recency = np.where(bill_age >= 0, np.clip(1.0 - bill_age / float(max_bill_age_days), 0.0, 1.0), 0.0)
+
+    consistency = 0.5 * address_overlap + 0.3 * name_similarity + 0.2 * recency
+    flagged = (
+        (address_overlap < min_address_overlap)
+        | ~same_pin
+        | (name_similarity < min_name_similarity)
+        | (bill_age < 0)
+        | (bill_age > max_bill_age_days)
+    )
+    return {
+        "address_overlap": address_overlap,
+        "name_similarity": name_similarity,
+        "bill_age_days": bill_age,
+        "same_pincode": same_pin,
+        "consistency": consistency,
+        "flagged": flagged,
+    }
+
+# ------------------------
+# Streaming symmetric hash join
+# ------------------------
+
+class ConsistencyJoin:
+    """
+    Pairs identity documents with proof-of-address bills as records stream
+    in. Each side keeps a hash table per join key; a new document probes the
+    other side's table and is then inserted into its own, so the input can
+    arrive in any order. Joined pairs are buffered and scored in chunks.
+
+    State is bounded by `window`: a document stays joinable until `window`
+    more documents have arrived, then it leaves both tables (and is reported
+    as unmatched right away if it never paired). Which pairs are produced
+    depends only on the input order and `window`, never on `chunk_size`.
+    """
+
+    def __init__(self, as_of=None, chunk_size=65536, max_key_fanout=50, window=250000, **score_kwargs):
+        self.as_of_day = (as_of or date.today()).toordinal()
+        self.chunk_size = chunk_size
+        # Keys shared by more documents than this (a large apartment block,
+        # a very common name) stop producing pairs instead of going quadratic
+        self.max_key_fanout = max_key_fanout
+        self.window = window
+        self.score_kwargs = score_kwargs
+        self.tables = {"id": {}, "bill": {}}
+        self.rows = {"id": {}, "bill": {}}
+        self.counts = {"id": 0, "bill": 0}
+        self._arrivals = deque()   # (side, idx) of resident documents, oldest first
+        self._pending = []         # (id row, bill row, key) awaiting scoring
+        self._expired = []         # unmatched reports for documents that left the window
+
+    def __len__(self):
+        """Documents currently resident in the join tables."""
+        return len(self._arrivals)
+
+    def add(self, record, ref=None):
+        """
+        Feed one extracted record; returns scored pairs whenever a chunk fills,
+        plus unmatched reports for documents that just left the window.
+        `ref` identifies the document in the output (default: its file name).
+        """
+        if is_identity_doc(record):
+            side, other = "id", "bill"
+        elif is_address_proof(record):
+            side, other = "bill", "id"
+        else:
+            return []
+        idx = self.counts[side]
+        self.counts[side] += 1
+        row = DocumentRow(record, ref if ref is not None else (record.get("file") or idx))
+        self.rows[side][idx] = row
+        self._arrivals.append((side, idx))
+
+        # A pair forms when its second document arrives, so duplicates (two
+        # shared keys) can only come from this one probe
+        seen = set()
+        for key in row.join_keys():
+            own = self.tables[side].setdefault(key, [])
+            if len(own) >= self.max_key_fanout:
+                continue
+            own.append(idx)
+            for other_idx in self.tables[other].get(key, ()):
+                if other_idx in seen:
+                    continue
+                seen.add(other_idx)
+                partner = self.rows[other][other_idx]
+                row.matched = partner.matched = True
+                pair = (row, partner) if side == "id" else (partner, row)
+                self._pending.append(pair + (key,))
+
+        while len(self._arrivals) > self.window:
+            self._evict(*self._arrivals.popleft())
+
+        out, self._expired = self._expired, []
+        if len(self._pending) >= self.chunk_size:
+            out.extend(self._flush())
+        return out
+
+    def _evict(self, side, idx):
+        row = self.rows[side].pop(idx)
+        table = self.tables[side]
+        for key in row.join_keys():
+            members = table.get(key)
+            if members is None or idx not in members:
+                continue
+            members.remove(idx)
+            if not members:
+                del table[key]
+        if not row.matched:
+            self._expired.append(self._unmatched(side, row))
+
+    @staticmethod
+    def _unmatched(side, row):
+        label = "identity_doc" if side == "id" else "address_doc"
+        return {label: row.ref, "joined_on": None, "flagged": True,
+                "reason": "no matching identity document" if side == "bill"
+                else "no matching proof of address"}
+
+    def _flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        ids = [i for i, _, _ in pending]
+        bills = [b for _, b, _ in pending]
+        scores = score_pairs(ids, bills, self.as_of_day, **self.score_kwargs)
+        for n, (_, _, key) in enumerate(pending):
+            yield {
+                "identity_doc": ids[n].ref,
+                "address_doc": bills[n].ref,
+                "joined_on": key[0],
+                **{col: values[n].item() for col, values in scores.items()},
+            }
+
+    def finish(self):
+        """Flush the last chunk, then report documents that never found a partner."""
+        yield from self._expired
+        self._expired = []
+        yield from self._flush()
+        for side in ("id", "bill"):
+            for row in self.rows[side].values():
+                if not row.matched:
+                    yield self._unmatched(side, row)
+
+# ------------------------
+# Main Entry Point
+# ------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-check Aadhaar cards against utility bills.")
+    parser.add_argument("input", nargs="?", default="data/ocr_results.jsonl")
+    parser.add_argument("--output", default="data/processed/consistency.jsonl")
+    parser.add_argument("--as-of", help="reference date for bill recency (dd-mm-yyyy)")
+    parser.add_argument("--max-bill-age", type=int, default=90)
+    parser.add_argument("--window", type=int, default=250000,
+                        help="documents a card or bill waits for its partner before it is reported unmatched")
+    args = parser.parse_args()
+
+    as_of = datetime.strptime(args.as_of, "%d-%m-%Y").date() if args.as_of else None
+    join = ConsistencyJoin(as_of=as_of, window=args.window, max_bill_age_days=args.max_bill_age)
+
+    pairs = flagged = 0
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as out:
+        def write(rows):
+            nonlocal pairs, flagged
+            for row in rows:
+                pairs += 1
+                flagged += bool(row["flagged"])
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+        for record in iter_records(args.input):
+            write(join.add(record))
+        write(join.finish())
+
+    print(f"✅ {pairs} rows written to {args.output} ({flagged} flagged)")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+import sys
 import random
 from faker import Faker
 import qrcode
@@ -6,6 +7,13 @@ from PIL import Image, ImageDraw, ImageFont
 import barcode
 from barcode.writer import ImageWriter
 
+# Add project root to sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from utils.records import RecordSink, SyntheticPerson
+
 def generate_barcode(aadhaar_number, path):
     os.makedirs(os.path.dirname(path), exist_ok=True)   
     code128 = barcode.get('code128', aadhaar_number, writer=ImageWriter())
@@ -40,6 +48,8 @@ fake = Faker("en_IN")
 OUTPUT_AADHAAR = "data/raw_docs/aadhaar_samples"
 OUTPUT_UTILITY = "data/raw_docs/utility_samples"
 OUTPUT_PHOTOS = "data/raw_docs/photos"
+OUTPUT_PERSONS = "data/raw_docs/persons.jsonl"
+OUTPUT_PERSONS_CSV = "data/raw_docs/persons.csv"
 os.makedirs(OUTPUT_PHOTOS, exist_ok=True)
 
 try:
@@ -164,23 +174,23 @@ def generate_person(idx):
     utility_path = os.path.join(OUTPUT_UTILITY, f"person_{idx}_utility.jpg")
     generate_utility_template(name, address, account_number, bill_number, bill_date, due_date, amount, utility_path)
 
-    return {
-        "person_id": idx,
-        "name": name,
-        "dob": dob,
-        "gender": gender,
-        "address": address,
-        "aadhaar_number": aadhaar_number,
-        "mobile": mobile,
-        "enrollment_number": enroll_no,
-        "account_number": account_number,
-        "bill_number": bill_number,
-        "bill_date": bill_date,
-        "due_date": due_date,
-        "amount_due": amount,
-        "aadhaar_file": aadhaar_path,
-        "utility_file": utility_path
-    }
+    return SyntheticPerson(
+        person_id=idx,
+        name=name,
+        dob=dob,
+        gender=gender,
+        address=address,
+        aadhaar_number=aadhaar_number,
+        mobile=mobile,
+        enrollment_number=enroll_no,
+        account_number=account_number,
+        bill_number=bill_number,
+        bill_date=bill_date,
+        due_date=due_date,
+        amount_due=amount,
+        aadhaar_file=aadhaar_path,
+        utility_file=utility_path
+    )
 
 
 
@@ -188,12 +198,13 @@ def main():
     os.makedirs(OUTPUT_AADHAAR, exist_ok=True)
     os.makedirs(OUTPUT_UTILITY, exist_ok=True)
 
-    persons = []
-    for i in range(1, 21): 
-        person = generate_person(i)
-        persons.append(person)
+    # Ground truth for each generated pair, streamed out as it is produced
+    with RecordSink(OUTPUT_PERSONS, OUTPUT_PERSONS_CSV, csv_fields=SyntheticPerson.FIELDS,
+                    csv_text_fields=("aadhaar_number",)) as sink:
+        for i in range(1, 21):
+            sink.write(generate_person(i))
 
-    print("Generated structured Aadhaar + Utility Bills for 20 people")
+    print(f"Generated structured Aadhaar + Utility Bills for {sink.count} people ({OUTPUT_PERSONS})")
 
 
 if __name__ == "__main__":
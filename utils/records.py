@@ -0,0 +1,166 @@
+import os
+import csv
+import json
+
+# ------------------------
+# Slotted record types
+# ------------------------
+# Records that stay in memory in bulk (OCR results, merged persons,
+# synthetic ground truth) use __slots__ instead of per-record dicts, so the
+# field names are stored once per class rather than once per row.
+
+class SlotRecord:
+    __slots__ = ()
+    FIELDS = ()
+    DEFAULTS = {}
+
+    def __init__(self, **values):
+        for field in self.FIELDS:
+            setattr(self, field, values.get(field, self.DEFAULTS.get(field, "")))
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build from a plain dict, ignoring keys the record does not carry."""
+        return cls(**{f: data[f] for f in cls.FIELDS if f in data})
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, f) == getattr(other, f) for f in self.FIELDS
+        )
+
+    def __repr__(self):
+        body = ", ".join(f"{f}={getattr(self, f)!r}" for f in self.FIELDS)
+        return f"{type(self).__name__}({body})"
+
+
+class OcrRecord(SlotRecord):
+    """Fields parsed from one OCR'd document (ocr/field_extractor.py)."""
+    FIELDS = ("file", "document_type", "name", "aadhaar_number", "dob", "gender", "address", "bill_date")
+    __slots__ = FIELDS
+
+
+class PersonRecord(SlotRecord):
+    """One merged person in the cleaned dataset (utils/cleaning_utils.py)."""
+    FIELDS = ("name", "address", "aadhaar_number", "bill_date", "address_verified")
+    __slots__ = FIELDS
+    DEFAULTS = {"address_verified": False}
+
+
+class SyntheticPerson(SlotRecord):
+    """Ground truth behind one generated Aadhaar + utility bill pair (utils/generate_synthetic.py)."""
+    FIELDS = (
+        "person_id", "name", "dob", "gender", "address", "aadhaar_number", "mobile",
+        "enrollment_number", "account_number", "bill_number", "bill_date", "due_date",
+        "amount_due", "aadhaar_file", "utility_file",
+    )
+    __slots__ = FIELDS
+    DEFAULTS = {"person_id": 0, "amount_due": 0}
+
+# ------------------------
+# Streaming reader
+# ------------------------
+
+def iter_records(path, chunk_size=1 << 16):
+    """
+    Yield dicts from a JSON array (e.g. data/ocr_raw.json) or a JSONL file
+    without loading the whole file: array elements are decoded one at a time
+    from a sliding text buffer.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf = f.read(chunk_size)
+        while buf.isspace():
+            more = f.read(chunk_size)
+            if not more:
+                return
+            buf += more
+        buf = buf.lstrip()
+        if not buf.startswith("["):
+            f.seek(0)
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        pos = 1
+        while True:
+            while pos < len(buf) and (buf[pos].isspace() or buf[pos] == ","):
+                pos += 1
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            try:
+                obj, pos = decoder.raw_decode(buf, pos)
+            except ValueError:
+                # Element runs past the buffer: keep the unread tail and read more
+                more = f.read(chunk_size)
+                if not more:
+                    raise ValueError(f"Truncated JSON array in {path}")
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+            yield obj
+
+# ------------------------
+# One-pass JSONL + CSV sink
+# ------------------------
+
+class RecordSink:
+    """
+    Writes each record to a JSONL file and a CSV file as it arrives, so a
+    dataset is serialized in one pass and never held in memory as a whole.
+
+    csv_text_fields: columns prefixed with a tab so spreadsheet tools keep
+    long digit strings (Aadhaar numbers) as text.
+    """
+
+    def __init__(self, jsonl_path=None, csv_path=None, csv_fields=None, csv_text_fields=()):
+        self.csv_fields = list(csv_fields) if csv_fields else None
+        self.csv_text_fields = tuple(csv_text_fields)
+        self.count = 0
+        self._jsonl = self._open(jsonl_path)
+        self._csv_file = self._open(csv_path, newline="")
+        self._csv = None
+
+    @staticmethod
+    def _open(path, **kwargs):
+        if not path:
+            return None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        return open(path, "w", encoding="utf-8", **kwargs)
+
+    def write(self, record):
+        row = record.to_dict() if isinstance(record, SlotRecord) else record
+        if self._jsonl is not None:
+            self._jsonl.write(json.dumps(row, ensure_ascii=False) + "\n")
+        if self._csv_file is not None:
+            if self._csv is None:
+                fields = self.csv_fields or list(row)
+                self._csv = csv.DictWriter(self._csv_file, fieldnames=fields, extrasaction="ignore")
+                self._csv.writeheader()
+            if self.csv_text_fields:
+                row = dict(row)
+                for field in self.csv_text_fields:
+                    if row.get(field):
+                        row[field] = "\t" + str(row[field])
+            self._csv.writerow(row)
+        self.count += 1
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def close(self):
+        for handle in (self._jsonl, self._csv_file):
+            if handle is not None:
+                handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False